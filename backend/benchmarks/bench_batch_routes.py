@@ -0,0 +1,110 @@
+"""
+Benchmark /get_safe_routes_batch against the same pairs sent one at a time to /get_safe_route.
+
+Routing comes from a local openrouteservice stand-in and the OpenCellID lookup is replaced by a
+stub with a fixed delay, so the numbers reflect how much work each path does rather than network
+luck. The real risk model and TASMAC data are used, and both paths start with an empty point-risk
+cache. Pairs are drawn from a small set of campuses and transit stops, so many of them share
+endpoints and route vertices, as on the partner dashboard.
+
+Run from the backend directory:
+    python benchmarks/bench_batch_routes.py [--pairs 10 50 200] [--network-latency 0.002]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from contextlib import redirect_stdout
+
+os.environ['FAST_START'] = 'lazy'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import safe_route
+from stubs import StubORSClient
+
+# Rough Chennai bounding box
+LAT_RANGE = (12.95, 13.10)
+LNG_RANGE = (80.20, 80.28)
+
+
+def make_pairs(count, endpoints, seed=42):
+    rng = random.Random(seed)
+    places = [{'latitude': round(rng.uniform(*LAT_RANGE), 4), 'longitude': round(rng.uniform(*LNG_RANGE), 4)}
+              for _ in range(endpoints)]
+    pairs = []
+    for i in range(count):
+        src, dest = rng.sample(places, 2)
+        pairs.append({'id': f'pair-{i}', 'src': src, 'dest': dest})
+    return pairs
+
+
+def stub_network_strength(latency):
+    def calculate_network_strength(lat, lng, radius=0.0085):
+        if latency:
+            time.sleep(latency)
+        return -60 - (int(lat * 1e4) + int(lng * 1e4)) % 30
+    return calculate_network_strength
+
+
+def run_sequential(client, pairs):
+    results = []
+    for pair in pairs:
+        response = client.post('/get_safe_route', json={'src': pair['src'], 'dest': pair['dest']})
+        results.append(response.get_json())
+    return results
+
+
+def run_batch(client, pairs):
+    response = client.post('/get_safe_routes_batch', json={'pairs': pairs})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    return lines[:-1], lines[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--endpoints', type=int, default=20, help='distinct campuses/stops the pairs are drawn from')
+    parser.add_argument('--network-latency', type=float, default=0.002, help='seconds per stubbed OpenCellID lookup')
+    parser.add_argument('--route-latency', type=float, default=0.0, help='seconds per stubbed routing call')
+    args = parser.parse_args()
+
+    ors_client = StubORSClient(latency=args.route_latency)
+    safe_route._artifacts['ors_client'] = ors_client
+    safe_route.calculate_network_strength = stub_network_strength(args.network_latency)
+    client = safe_route.app.test_client()
+    with redirect_stdout(open(os.devnull, 'w')):
+        safe_route.warm_up()
+
+    print(f"{'pairs':>6} {'sequential':>11} {'batch':>9} {'speedup':>8} {'route calls':>12} "
+          f"{'points':>8} {'unique':>8} {'seq hits':>9} {'max diff':>9}")
+    for count in args.pairs:
+        pairs = make_pairs(count, args.endpoints)
+        with redirect_stdout(open(os.devnull, 'w')):
+            safe_route.point_risk_cache = safe_route.PointRiskCache()
+            ors_client.calls = 0
+            started = time.perf_counter()
+            sequential = run_sequential(client, pairs)
+            sequential_seconds = time.perf_counter() - started
+            sequential_calls = ors_client.calls
+            sequential_hit_rate = safe_route.point_risk_cache.stats()['hit_rate']
+
+            safe_route.point_risk_cache = safe_route.PointRiskCache()
+            ors_client.calls = 0
+            started = time.perf_counter()
+            batch, summary = run_batch(client, pairs)
+            batch_seconds = time.perf_counter() - started
+            batch_calls = ors_client.calls
+
+        # Both paths should pick the same route with the same risk
+        by_index = {line['index']: line for line in batch}
+        max_diff = max(abs(single['total_risk'] - by_index[i]['total_risk']) for i, single in enumerate(sequential))
+        print(f"{count:>6} {sequential_seconds:>10.2f}s {batch_seconds:>8.2f}s {sequential_seconds / batch_seconds:>7.1f}x "
+              f"{sequential_calls:>5} -> {batch_calls:<4} {summary['route_points']:>8} {summary['unique_points']:>8} "
+              f"{sequential_hit_rate:>8.0%} {max_diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
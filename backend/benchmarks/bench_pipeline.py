@@ -0,0 +1,135 @@
+"""
+Benchmark StoryAnalyzer.run_analysis stage by stage without a Groq key or a database.
+
+Stories come from the synthetic generator, the LLM is a local stub with optional latency and
+failure injection, and MongoDB is an in-memory stand-in. Each stage (extract, analyze,
+aggregate, visualize, pdf) is timed separately. Memory is read from the process's peak RSS
+rather than traced, since tracemalloc slows the pure-Python stages by an order of magnitude;
+the peak RSS of the chart worker processes is reported separately.
+
+Run from the backend directory:
+    python benchmarks/bench_pipeline.py [--sizes 1000 10000 100000] [--latency 0.0] [--dedup]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from story_analysis import StoryAnalyzer
+from report_writer import MAX_PAGES_PER_VOLUME
+from stubs import InMemoryMongoClient, StubLLM
+from synthetic import generate_stories
+
+STAGES = ['extract', 'analyze', 'aggregate', 'visualize', 'pdf']
+
+
+def parse_language_mix(value):
+    """'en=0.8,ta=0.1,hi=0.1' -> {'en': 0.8, 'ta': 0.1, 'hi': 0.1}"""
+    mix = {}
+    for part in value.split(','):
+        language, weight = part.split('=')
+        mix[language.strip()] = float(weight)
+    return mix
+
+
+def peak_rss():
+    """(this process, largest finished child process) peak resident set size in bytes, or None"""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def timed(fn):
+    """Run fn with stdout silenced; returns (result, seconds)"""
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        result = fn()
+    return result, time.perf_counter() - started
+
+
+def mib(value):
+    return f"{value / 1024 / 1024:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def run_size(size, args):
+    client = InMemoryMongoClient()
+    client['WithU']['stories'].insert_many(generate_stories(
+        size,
+        min_words=args.min_words,
+        max_words=args.max_words,
+        language_mix=args.language_mix,
+        duplicate_rate=args.duplicate_rate,
+    ))
+
+    llm = StubLLM(latency=args.latency, jitter=args.latency / 4,
+                  failure_rate=args.failure_rate, malformed_rate=args.malformed_rate)
+    analyzer = StoryAnalyzer(client=client, llm=llm)
+    if args.dedup:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            analyzer.enable_dedup()
+
+    state = {}
+    steps = {
+        'extract': lambda: state.setdefault('stories', analyzer.extract_stories()),
+        'analyze': lambda: state.setdefault('analyzed', analyzer.content_analysis(state['stories'])),
+        'aggregate': lambda: state.setdefault('stats', analyzer.generate_summary_stats(state['analyzed'])),
+        'visualize': lambda: state.setdefault('viz', analyzer.create_visualizations(state['stats'], state['analyzed'])),
+        'pdf': lambda: analyzer.generate_pdf_report(state['analyzed'], state['stats'], state['viz'],
+                                                    max_pages_per_volume=args.max_pages),
+    }
+
+    # Peak RSS only ever grows, so each stage shows the high-water mark reached by its end
+    print(f"\n{size} stories")
+    print(f"  {'stage':<10} {'seconds':>9} {'stories/s':>11} {'RSS MiB':>9} {'child MiB':>9}")
+    total = 0.0
+    for stage in STAGES:
+        _, elapsed = timed(steps[stage])
+        total += elapsed
+        rate = size / elapsed if elapsed > 0 else float('inf')
+        own, child = peak_rss()
+        print(f"  {stage:<10} {elapsed:9.2f} {rate:11.0f} {mib(own)} {mib(child)}")
+    print(f"  {'total':<10} {total:9.2f} {size / total:11.0f}")
+    print(f"  LLM calls: {llm.calls} ({llm.failures} injected failures)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--min-words', type=int, default=40)
+    parser.add_argument('--max-words', type=int, default=250)
+    parser.add_argument('--language-mix', type=parse_language_mix, default={'en': 0.8, 'ta': 0.1, 'hi': 0.1})
+    parser.add_argument('--duplicate-rate', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0.0, help='mean stub LLM latency in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES_PER_VOLUME, help='pages per PDF volume')
+    parser.add_argument('--dedup', action='store_true', help='enable near-duplicate detection')
+    args = parser.parse_args()
+
+    # Keep caches, charts and reports out of the working tree, and give each size its own
+    # directory so the dedup index and label cache don't carry over between sizes
+    original_dir = os.getcwd()
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            try:
+                run_size(size, args)
+            finally:
+                os.chdir(original_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the streaming report writer and exports.
+
+Run from the backend directory:
+    python benchmarks/bench_report_writer.py [--sizes 100 10000 100000] [--max-pages 100]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_writer import PDFReportWriter, EXPORTERS, MAX_PAGES_PER_VOLUME
+
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+LOCATIONS = ['Adyar', 'T Nagar', 'Velachery', 'Egmore', 'Tambaram', 'Guindy', 'Anna Nagar']
+TOPICS = ['harassment', 'stalking', 'poor lighting', 'unsafe transport', 'theft', 'verbal abuse']
+
+
+def synthetic_analyses(count, seed=42):
+    """Yield analysis dicts shaped like StoryAnalyzer output, generated lazily"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        yield {
+            'id': f'{i:024x}',
+            'author_id': f'user{rng.randint(1, 5000)}',
+            'title': f'Incident report {i}',
+            'severity_level': rng.choice(SEVERITIES),
+            'severity_explanation': 'Synthetic benchmark story',
+            'locations': rng.sample(LOCATIONS, 2),
+            'main_topics': rng.sample(TOPICS, 3),
+            'sentiment': {'negative': 0.6, 'neutral': 0.3, 'positive': 0.1},
+            'word_count': rng.randint(40, 400),
+            'audience_impact': 'Raises awareness of unsafe areas at night',
+            'key_entities': ['bus stop', 'auto driver'],
+            'summary': 'A commuter describes being followed near a bus stop late at night.',
+            'created_at': start + timedelta(minutes=i),
+        }
+
+
+def summary_for(count):
+    return {
+        'total_stories': count,
+        'severity_counts': {s: count // 4 for s in SEVERITIES},
+        'top_locations': {loc: count // 7 for loc in LOCATIONS[:5]},
+        'top_topics': {t: count // 6 for t in TOPICS[:5]},
+        'top_entities': {'bus stop': count // 2},
+        'avg_word_count': 220.0,
+        'avg_sentiment': {'negative': 0.6, 'neutral': 0.3, 'positive': 0.1},
+    }
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<8} {elapsed:8.2f}s  peak {peak / 1024 / 1024:8.1f} MiB  -> {result}")
+
+
+def run(sizes, max_pages, formats):
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            print(f"{size} stories")
+
+            def write_pdf():
+                writer = PDFReportWriter(os.path.join(tmp, f'report_{size}'), max_pages_per_volume=max_pages)
+                writer.write_front_matter(summary_for(size), [], datetime.now().strftime('%Y-%m-%d'))
+                writer.write_stories(synthetic_analyses(size))
+                return f"{len(writer.close())} volume(s)"
+
+            measure('pdf', write_pdf)
+            for fmt in formats:
+                path = os.path.join(tmp, f'export_{size}.{fmt}')
+                measure(fmt, lambda: f"{EXPORTERS[fmt](synthetic_analyses(size), path)} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES_PER_VOLUME)
+    parser.add_argument('--formats', nargs='+', default=['jsonl', 'csv', 'parquet'], choices=sorted(EXPORTERS))
+    args = parser.parse_args()
+    run(args.sizes, args.max_pages, args.formats)
@@ -0,0 +1,121 @@
+"""
+Measure cold-start cost of the Python services, one fresh interpreter per module and mode.
+
+For each module this reports the time to import it, the time its warm_up() takes afterwards
+(the artifacts a first request would otherwise pay for), the per-artifact timings the module
+records, and the heaviest imports according to `python -X importtime`.
+
+Each child runs in a scratch directory holding links to the backend's data files, so logs and
+caches the services create on startup stay out of the working tree.
+
+Run from the backend directory:
+    python benchmarks/startup_profile.py [--modes eager lazy] [--top 8]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['story_analysis', 'safe_route', 'false_sos_detection']
+MARKER = 'STARTUP_PROFILE '
+
+CHILD = f"""
+import sys, time, json
+sys.stdout = sys.stderr  # keep module output away from the result line
+started = time.perf_counter()
+module = __import__(sys.argv[1])  # unlike importlib, shows up in -X importtime
+import_seconds = time.perf_counter() - started
+warm_up_seconds = None
+if hasattr(module, 'warm_up'):
+    started = time.perf_counter()
+    module.warm_up()
+    warm_up_seconds = time.perf_counter() - started
+result = {{
+    'import': import_seconds,
+    'warm_up': warm_up_seconds,
+    'timings': getattr(module, 'startup_timings', {{}}),
+}}
+sys.__stdout__.write({MARKER!r} + json.dumps(result) + '\\n')
+"""
+
+
+def parse_importtime(stderr, module, top):
+    """The profiled module's heaviest direct imports from -X importtime output, as (package, seconds)"""
+    # importtime lists children before their parent, indented two spaces per level
+    pending = {}
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            package = name.strip().split('.')[0]
+            pending[package] = pending.get(package, 0) + int(cumulative) / 1e6
+        elif depth == 0:
+            if name.strip() == module:
+                totals = pending
+            pending = {}
+    return sorted(totals.items(), key=lambda x: x[1], reverse=True)[:top]
+
+
+def link_data_files(workdir):
+    """Link the backend's data files (model, CSVs, caches) into workdir so relative paths resolve"""
+    for name in os.listdir(BACKEND_DIR):
+        path = os.path.join(BACKEND_DIR, name)
+        if os.path.isfile(path) and not name.endswith('.py'):
+            os.symlink(path, os.path.join(workdir, name))
+
+
+def profile(module, mode, top):
+    pythonpath = os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get('PYTHONPATH')]))
+    env = dict(os.environ, FAST_START=mode, PYTHONPATH=pythonpath)
+    with tempfile.TemporaryDirectory() as workdir:
+        link_data_files(workdir)
+        proc = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', CHILD, module],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKER):
+            result = json.loads(line[len(MARKER):])
+    if result is None:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'exit code {proc.returncode}'
+        return {'error': error}
+    result['heaviest_imports'] = parse_importtime(proc.stderr, module, top)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--modes', nargs='+', default=['eager', 'lazy'], choices=['eager', 'lazy', 'background'])
+    parser.add_argument('--top', type=int, default=8, help='number of heaviest imports to list')
+    parser.add_argument('--json', action='store_true', help='print raw JSON instead of a table')
+    args = parser.parse_args()
+
+    results = {module: {mode: profile(module, mode, args.top) for mode in args.modes} for module in args.modules}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for module, by_mode in results.items():
+        print(f"\n{module}")
+        for mode, result in by_mode.items():
+            if 'error' in result:
+                print(f"  {mode:<10} failed: {result['error']}")
+                continue
+            warm = f"{result['warm_up']:.3f}s" if result['warm_up'] is not None else '-'
+            print(f"  {mode:<10} import {result['import']:.3f}s  warm-up {warm}")
+            for name, seconds in sorted(result['timings'].items(), key=lambda x: x[1], reverse=True):
+                print(f"    init    {name:<28} {seconds:.3f}s")
+            for name, seconds in result['heaviest_imports']:
+                print(f"    import  {name:<28} {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Local stand-ins for the external services used by the backend: an in-memory MongoDB client,
+a Groq-like LLM with latency and failure injection, and an openrouteservice-like routing client.
+"""
+import json
+import time
+import random
+import threading
+
+from pymongo.errors import DuplicateKeyError
+
+from local_classifier import extract_locations, keyword_severity
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict) and any(op.startswith('$') for op in condition):
+            for op, operand in condition.items():
+                if op == '$gt' and not (value is not None and value > operand):
+                    return False
+                if op == '$gte' and not (value is not None and value >= operand):
+                    return False
+                if op == '$lt' and not (value is not None and value < operand):
+                    return False
+                if op == '$lte' and not (value is not None and value <= operand):
+                    return False
+                if op == '$in' and value not in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class InMemoryCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        self.docs = sorted(self.docs, key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class InMemoryCollection:
+    """The subset of pymongo's Collection API the pipeline and job runner use"""
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def insert_many(self, docs):
+        with self.lock:
+            for doc in docs:
+                if doc['_id'] in self.docs:
+                    raise DuplicateKeyError(f"duplicate _id {doc['_id']}")
+                self.docs[doc['_id']] = doc
+
+    def insert_one(self, doc):
+        self.insert_many([doc])
+
+    def find(self, query=None):
+        query = query or {}
+        return InMemoryCursor([doc for doc in self.docs.values() if _matches(doc, query)])
+
+    def find_one(self, query=None):
+        return next(iter(self.find(query)), None)
+
+    def find_one_and_update(self, query, update, upsert=False):
+        with self.lock:
+            doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+            if doc is None:
+                if not upsert:
+                    return None
+                if '_id' in query and query['_id'] in self.docs:
+                    raise DuplicateKeyError(f"duplicate _id {query['_id']}")
+                doc = {k: v for k, v in query.items() if not k.startswith('$')}
+                self.docs[doc['_id']] = doc
+            before = dict(doc)
+            doc.update(update.get('$set', {}))
+            return before
+
+    def delete_one(self, query):
+        with self.lock:
+            doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+            if doc is not None:
+                del self.docs[doc['_id']]
+
+    def count_documents(self, query):
+        return sum(1 for _ in self.find(query))
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, InMemoryCollection())
+
+
+class InMemoryMongoClient:
+    def __init__(self):
+        self.databases = {}
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, InMemoryDatabase())
+
+
+class StubLLMError(Exception):
+    """Injected failure, standing in for rate limits and timeouts"""
+
+
+class StubLLM:
+    """
+    Groq-compatible `complete(prompt)` that answers with plausible JSON built from the story text.
+    `latency` is the mean delay in seconds (jittered by `jitter`), `failure_rate` the share of calls
+    that raise and `malformed_rate` the share that return text without valid JSON.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, malformed_rate=0.0, seed=7):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def complete(self, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+        roll = self.rng.random()
+        if roll < self.failure_rate:
+            self.failures += 1
+            raise StubLLMError("Injected LLM failure (rate limited)")
+        if roll < self.failure_rate + self.malformed_rate:
+            return "I'm sorry, I can't produce JSON for this story."
+
+        title = _between(prompt, 'Story Title: ', '\n')
+        description = _between(prompt, 'Story Description: ', '\n\nProvide analysis')
+        text = f"{title} {description}"
+        severity, neg_count = keyword_severity(text)
+        words = text.split()
+        return json.dumps({
+            "severity_level": severity,
+            "severity_explanation": f"{neg_count} concerning terms",
+            "locations": extract_locations(text),
+            "main_topics": sorted({w.lower() for w in words if len(w) > 6})[:3] or ["general"],
+            "sentiment": {"negative": 0.6, "neutral": 0.3, "positive": 0.1},
+            "word_count": len(words),
+            "audience_impact": "Raises awareness of unsafe areas",
+            "key_entities": [w for w in words if w[:1].isupper()][:2],
+            "summary": title or "Untitled story",
+        })
+
+
+def _between(text, start, end):
+    begin = text.find(start)
+    if begin < 0:
+        return ''
+    begin += len(start)
+    finish = text.find(end, begin)
+    return text[begin:finish if finish >= 0 else None]
+
+
+class StubORSClient:
+    """
+    openrouteservice-compatible `directions(...)` returning a straight walk from start to end
+    in `step`-degree hops. Each preference bends the walk slightly differently so the candidate
+    routes share most but not all of their vertices, like real ones do.
+    """
+
+    BENDS = {'recommended': 0.0, 'shortest': 0.0005, 'fastest': -0.0005}
+
+    def __init__(self, latency=0.0, step=0.001):
+        self.latency = latency
+        self.step = step
+        self.calls = 0
+
+    def directions(self, coordinates, profile='foot-walking', format='geojson', preference='recommended'):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        (start_lng, start_lat), (end_lng, end_lat) = coordinates
+        hops = max(1, int(max(abs(end_lat - start_lat), abs(end_lng - start_lng)) / self.step))
+        bend = self.BENDS.get(preference, 0.0)
+        route = []
+        for i in range(hops + 1):
+            t = i / hops
+            # Bend only the middle third so the ends are shared between preferences
+            offset = bend if 1 / 3 <= t <= 2 / 3 else 0.0
+            route.append([round(start_lng + (end_lng - start_lng) * t + offset, 6),
+                          round(start_lat + (end_lat - start_lat) * t, 6)])
+        return {'features': [{'geometry': {'type': 'LineString', 'coordinates': route}}]}
@@ -0,0 +1,80 @@
+"""
+Synthetic anonymous stories for benchmarking, shaped like documents in the `stories` collection.
+"""
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+ENGLISH = (
+    "I was walking home from work near the bus stop when a man started following me . "
+    "The street lights were off and it felt unsafe . An auto driver refused to stop . "
+    "Someone shouted at me and I felt a serious threat . Please avoid this road at night . "
+    "There was an emergency and nobody helped . The area is a danger after dark"
+).split()
+
+TAMIL = "நான் இரவு பேருந்து நிறுத்தம் அருகே நடந்து கொண்டிருந்தேன் ஒருவர் என்னை பின்தொடர்ந்தார் பயமாக இருந்தது".split()
+HINDI = "मैं रात को बस स्टॉप के पास चल रही थी एक आदमी मेरा पीछा कर रहा था मुझे डर लगा".split()
+
+LANGUAGES = {'en': ENGLISH, 'ta': TAMIL, 'hi': HINDI}
+
+PLACES = ['Adyar', 'T Nagar', 'Velachery', 'Egmore', 'Tambaram', 'Guindy', 'Anna Nagar', 'Mylapore']
+PLACE_PHRASES = ['in {}', 'at {}', 'from {}']
+
+
+def _story_text(rng, length, language):
+    words = LANGUAGES[language]
+    body = [rng.choice(words) for _ in range(length)]
+    # English stories mention a place the way users usually do, which the extractors pick up
+    if language == 'en':
+        body.insert(rng.randrange(len(body) + 1), rng.choice(PLACE_PHRASES).format(rng.choice(PLACES)))
+    return ' '.join(body)
+
+
+def _lightly_edit(rng, text):
+    """Substitute, insert or delete a few words, the way a reposted story differs from the original"""
+    words = text.split()
+    for _ in range(max(1, len(words) // 50)):
+        i = rng.randrange(len(words))
+        edit = rng.random()
+        if edit < 0.4:
+            words[i] = rng.choice(words)
+        elif edit < 0.7 or len(words) < 10:
+            words.insert(i, rng.choice(words))
+        else:
+            del words[i]
+    return ' '.join(words)
+
+
+def generate_stories(count, min_words=40, max_words=250, language_mix=None, duplicate_rate=0.1, seed=42):
+    """
+    Yield `count` story documents. `language_mix` maps 'en'/'ta'/'hi' to weights and
+    `duplicate_rate` is the share of stories that are light edits of an earlier one.
+    """
+    rng = random.Random(seed)
+    language_mix = language_mix or {'en': 0.8, 'ta': 0.1, 'hi': 0.1}
+    languages, weights = zip(*language_mix.items())
+    start = datetime(2025, 1, 1)
+    originals = []
+
+    for i in range(count):
+        if originals and rng.random() < duplicate_rate:
+            title, description = rng.choice(originals)
+            description = _lightly_edit(rng, description)
+        else:
+            language = rng.choices(languages, weights)[0]
+            description = _story_text(rng, rng.randint(min_words, max_words), language)
+            title = f"Incident {i}"
+            # Bound the pool of originals so memory stays flat for large runs
+            if len(originals) < 1000:
+                originals.append((title, description))
+            else:
+                originals[rng.randrange(1000)] = (title, description)
+
+        yield {
+            '_id': ObjectId(f'{i:024x}'),
+            'title': title,
+            'description': description,
+            'author_id': f'user{rng.randint(1, 5000)}',
+            'createdAt': start + timedelta(minutes=i),
+        }
@@ -0,0 +1,204 @@
+import os
+import json
+import shutil
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')  # Headless backend, safe for servers and worker processes
+import matplotlib.pyplot as plt
+
+# Bump this whenever the drawing code changes so stale cached PNGs are not reused
+RENDER_VERSION = 1
+
+VIZ_DIR = 'viz'
+CACHE_DIR = os.path.join(VIZ_DIR, 'cache')
+# Least recently used PNGs beyond this many are deleted after each render
+CACHE_MAX_FILES = 500
+
+SEVERITY_COLORS = ['#FF5252', '#FFA726', '#FDD835', '#66BB6A']
+
+
+def _render_pie(spec, path):
+    """Render a pie chart (used for the severity distribution)"""
+    plt.figure(figsize=(8, 6))
+    labels = list(spec['data'].keys())
+    sizes = list(spec['data'].values())
+    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=spec.get('colors'))
+    plt.axis('equal')
+    plt.title(spec['title'])
+    plt.savefig(path, bbox_inches='tight')
+    plt.close()
+
+
+def _render_bar(spec, path):
+    """Render a bar chart (used for top locations and topics)"""
+    plt.figure(figsize=(10, 6))
+    labels = list(spec['data'].keys())
+    counts = list(spec['data'].values())
+    plt.bar(labels, counts, color=spec.get('color', 'skyblue'))
+    plt.xticks(rotation=45, ha='right')
+    plt.title(spec['title'])
+    plt.xlabel(spec.get('xlabel', ''))
+    plt.ylabel(spec.get('ylabel', 'Count'))
+    plt.tight_layout()
+    plt.savefig(path, bbox_inches='tight')
+    plt.close()
+
+
+def _render_radar(spec, path):
+    """Render a polar radar chart (used for average sentiment)"""
+    labels = list(spec['data'].keys())
+    values = list(spec['data'].values())
+
+    # What will be the angle of each axis in the plot
+    N = len(labels)
+    angles = [n / float(N) * 2 * 3.14159 for n in range(N)]
+    angles += angles[:1]  # Close the loop
+    values += values[:1]
+
+    fig = plt.figure(figsize=(8, 8))
+    ax = fig.add_subplot(111, polar=True)
+    plt.xticks(angles[:-1], labels)
+    ax.plot(angles, values, linewidth=2, linestyle='solid')
+    ax.fill(angles, values, alpha=0.25)
+    plt.title(spec['title'], size=15)
+    plt.savefig(path, bbox_inches='tight')
+    plt.close()
+
+
+RENDERERS = {
+    'pie': _render_pie,
+    'bar': _render_bar,
+    'radar': _render_radar,
+}
+
+
+def chart_hash(spec):
+    """Stable hash of everything that affects how a chart looks"""
+    payload = json.dumps({'version': RENDER_VERSION, 'spec': spec}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _render_to_cache(spec, cache_path):
+    """Worker entry point: draw one chart into the cache"""
+    # Write to a temporary name first so a crashed worker never leaves a half-written PNG
+    # (keeping the .png suffix, which matplotlib uses to pick the output format)
+    tmp_path = f"{cache_path[:-len('.png')]}.{os.getpid()}.tmp.png"
+    RENDERERS[spec['kind']](spec, tmp_path)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def build_chart_specs(summary_stats, analyzed_stories):
+    """Build the chart specs for one set of summary stats, mirroring the report charts"""
+    specs = [{
+        'name': 'severity_distribution',
+        'kind': 'pie',
+        'title': 'Story Severity Distribution',
+        'data': summary_stats['severity_counts'],
+        'colors': SEVERITY_COLORS,
+    }]
+
+    if summary_stats['top_locations']:
+        specs.append({
+            'name': 'top_locations',
+            'kind': 'bar',
+            'title': 'Top Mentioned Locations',
+            'data': summary_stats['top_locations'],
+            'color': 'skyblue',
+            'xlabel': 'Location',
+        })
+
+    if summary_stats['top_topics']:
+        specs.append({
+            'name': 'top_topics',
+            'kind': 'bar',
+            'title': 'Top Story Topics',
+            'data': summary_stats['top_topics'],
+            'color': 'lightgreen',
+            'xlabel': 'Topic',
+        })
+
+    if summary_stats['total_stories'] > 0:
+        specs.append({
+            'name': 'sentiment_analysis',
+            'kind': 'radar',
+            'title': 'Average Sentiment Analysis',
+            'data': summary_stats['avg_sentiment'],
+        })
+
+    return specs
+
+
+def render_charts(chart_sets, output_dir=VIZ_DIR, cache_dir=CACHE_DIR, max_workers=None,
+                  cache_max_files=CACHE_MAX_FILES):
+    """
+    Render one or more chart sets in parallel, reusing cached PNGs for unchanged data.
+
+    chart_sets maps a partition name to a list of chart specs. The partition named
+    None is written straight into output_dir, every other partition gets its own
+    sub-directory. Returns a dict mapping each partition to its list of PNG paths.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Work out which charts actually need drawing; identical specs are drawn only once
+    pending = {}
+    targets = {}
+    for partition, specs in chart_sets.items():
+        partition_dir = output_dir if partition is None else os.path.join(output_dir, _slugify(partition))
+        os.makedirs(partition_dir, exist_ok=True)
+        targets[partition] = []
+        for spec in specs:
+            cache_path = os.path.join(cache_dir, f"{chart_hash(spec)}.png")
+            if os.path.exists(cache_path):
+                os.utime(cache_path)  # Mark as recently used so pruning keeps it
+            else:
+                pending[cache_path] = spec
+            targets[partition].append((cache_path, os.path.join(partition_dir, f"{spec['name']}.png")))
+
+    cached = sum(len(t) for t in targets.values()) - len(pending)
+    print(f"Rendering {len(pending)} charts ({cached} reused from cache)")
+
+    if len(pending) == 1 or max_workers == 1:
+        for cache_path, spec in pending.items():
+            _render_to_cache(spec, cache_path)
+    elif pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_render_to_cache, spec, cache_path) for cache_path, spec in pending.items()]
+            for future in as_completed(futures):
+                future.result()
+
+    viz_paths = {}
+    for partition, pairs in targets.items():
+        viz_paths[partition] = []
+        for cache_path, out_path in pairs:
+            shutil.copyfile(cache_path, out_path)
+            viz_paths[partition].append(out_path)
+
+    prune_cache(cache_dir, cache_max_files)
+    return viz_paths
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_files=CACHE_MAX_FILES):
+    """Delete the least recently used cached PNGs so at most max_files remain"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.png') and '.tmp' not in name:
+            entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+    for _, path in entries[max_files:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _slugify(name):
+    """Turn a partition name such as a city into a safe, unique directory name"""
+    slug = ''.join(c.lower() if c.isalnum() else '_' for c in str(name)).strip('_')
+    # Names such as "Anna Nagar" and "anna nagar" share a slug, so add a short hash of the original
+    suffix = hashlib.sha1(str(name).encode('utf-8')).hexdigest()[:8]
+    return f"{slug or 'unknown'}_{suffix}"
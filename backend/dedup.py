@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+
+DEDUP_INDEX_PATH = 'story_dedup_index.jsonl'
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text, size=3):
+    """Word n-gram shingles of the normalized text; very short texts fall back to single words"""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash_shingle(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+class MinHashLSH:
+    """
+    MinHash signatures bucketed by LSH bands. Stories whose estimated Jaccard similarity
+    is at least `threshold` are treated as near-duplicates of the first one seen (the canonical).
+    """
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+
+        # a, b and the shingle hashes are all 32-bit, so a * h + b never overflows uint64
+        rng = np.random.RandomState(seed)
+        self.perm_a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}   # story id -> signature
+        self.text_hashes = {}  # story id -> hash of the text it was indexed with
+        self.canonical = {}    # story id -> canonical story id
+        # canonical story id -> analysis; kept in memory only, the analyses themselves are
+        # persisted by whoever produced them (e.g. a job's analyses file)
+        self.analyses = {}
+
+        # Changes not yet appended to the file the index was loaded from or last saved to
+        self.path = None
+        self.pending = []
+        self.lines = 0
+
+    def signature(self, text):
+        """MinHash signature of the text, or None when it has no word tokens to compare"""
+        text_shingles = shingles(text)
+        if not text_shingles:
+            return None
+        hashed = np.array([_hash_shingle(s) for s in text_shingles], dtype=np.uint64)
+        permuted = (np.outer(hashed, self.perm_a) + self.perm_b) % np.uint64(_MERSENNE_PRIME)
+        return tuple((permuted & np.uint64(_MAX_HASH)).min(axis=0).tolist())
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def similarity(self, sig_a, sig_b):
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / self.num_perm
+
+    def query(self, text, signature=None):
+        """Best canonical match for text as (story_id, similarity), or None"""
+        signature = signature or self.signature(text)
+        if signature is None:
+            return None
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            score = self.similarity(signature, self.signatures[candidate])
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.threshold:
+            return None
+        return self.canonical[best], best_score
+
+    def add(self, story_id, text):
+        """
+        Index a story and return its canonical id: its own id when it is new or unique,
+        otherwise the id of the story it duplicates. Re-adding an unchanged story is a no-op.
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if self.text_hashes.get(story_id) == digest:
+            return self.canonical[story_id]
+        if story_id in self.canonical:
+            # The story was edited since it was indexed, so its old cluster no longer applies
+            self.remove(story_id)
+
+        signature = self.signature(text)
+        # Empty or punctuation-only texts would all share one signature, so they are never clustered
+        match = self.query(text, signature) if signature is not None else None
+        canonical = match[0] if match else story_id
+        self._index(story_id, digest, signature, canonical)
+        self.pending.append({'op': 'add', 'id': story_id, 'hash': digest,
+                             'signature': signature and list(signature), 'canonical': canonical})
+        return canonical
+
+    def _index(self, story_id, digest, signature, canonical):
+        self.text_hashes[story_id] = digest
+        self.canonical[story_id] = canonical
+        if signature is None:
+            return
+        self.signatures[story_id] = signature
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, []).append(story_id)
+
+    def remove(self, story_id):
+        self.pending.append({'op': 'remove', 'id': story_id})
+        self._unindex(story_id)
+
+    def _unindex(self, story_id):
+        signature = self.signatures.pop(story_id, None)
+        self.text_hashes.pop(story_id, None)
+        self.analyses.pop(story_id, None)
+        if signature is not None:
+            for band, key in self._band_keys(signature):
+                bucket = self.buckets[band].get(key, [])
+                if story_id in bucket:
+                    bucket.remove(story_id)
+        # Stories that pointed at this one become their own canonical
+        for other, canonical in list(self.canonical.items()):
+            if canonical == story_id:
+                self.canonical[other] = other
+        self.canonical.pop(story_id, None)
+
+    def clusters(self):
+        """Map of canonical id -> list of duplicate story ids, for clusters with duplicates"""
+        clusters = {}
+        for story_id, canonical in self.canonical.items():
+            if story_id != canonical:
+                clusters.setdefault(canonical, []).append(story_id)
+        return clusters
+
+    def _records(self):
+        """The current state as log records, for rewriting the file from scratch"""
+        yield {'op': 'config', 'num_perm': self.num_perm, 'bands': self.bands, 'seed': self.seed}
+        for story_id, canonical in self.canonical.items():
+            signature = self.signatures.get(story_id)
+            yield {'op': 'add', 'id': story_id, 'hash': self.text_hashes[story_id],
+                   'signature': signature and list(signature), 'canonical': canonical}
+
+    def save(self, path=DEDUP_INDEX_PATH):
+        """
+        Persist the index as an append-only JSONL log, so each save only writes what changed
+        since the last one. The file is rewritten (atomically) when saving somewhere new, or once
+        it holds twice as many records as the live index.
+        """
+        live = 1 + len(self.canonical)
+        if path != self.path or self.lines + len(self.pending) > 2 * live:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in self._records():
+                    f.write(json.dumps(record) + '\n')
+            os.replace(tmp_path, path)
+            self.path = path
+            self.lines = live
+        else:
+            with open(path, 'a', encoding='utf-8') as f:
+                for record in self.pending:
+                    f.write(json.dumps(record) + '\n')
+            self.lines += len(self.pending)
+        self.pending = []
+
+    @classmethod
+    def load(cls, path=DEDUP_INDEX_PATH, **kwargs):
+        """
+        Load a persisted index, or start an empty one. A threshold is applied to the loaded
+        index; num_perm, bands and seed fix its signatures, so they must match the saved ones.
+        """
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        index = None
+        lines = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Skip a torn final line from an interrupted save
+                if record['op'] == 'config':
+                    config = {name: record[name] for name in ('num_perm', 'bands', 'seed')}
+                    for name, value in config.items():
+                        if name in kwargs and kwargs[name] != value:
+                            raise ValueError(f"{path} was built with {name}={value}, not {kwargs[name]}; "
+                                             f"delete it to rebuild the index")
+                    index = cls(**dict(kwargs, **config))
+                elif record['op'] == 'add':
+                    signature = tuple(record['signature']) if record['signature'] else None
+                    index._index(record['id'], record['hash'], signature, record['canonical'])
+                elif record['op'] == 'remove':
+                    index._unindex(record['id'])
+        index.path = path
+        index.lines = lines
+        return index
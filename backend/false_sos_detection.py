@@ -1,35 +1,90 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from datetime import datetime, timedelta, timezone
-from pymongo import MongoClient
 import os
+import time
 import logging
+import threading
 from logging.handlers import RotatingFileHandler
 import pytz
 app = Flask(__name__)
 CORS(app)
 
-# Setup logging
-if not os.path.exists('logs'):
-    os.mkdir('logs')
-file_handler = RotatingFileHandler('logs/sos_service.log', maxBytes=10240, backupCount=10)
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
-file_handler.setLevel(logging.INFO)
-app.logger.addHandler(file_handler)
-app.logger.setLevel(logging.INFO)
-app.logger.info('SOS Verification Service started')
-
-# MongoDB connection
-MONGODB_URI = os.getenv("MONGODB_URL")
-client = MongoClient(MONGODB_URI)
-db = client["WithU"]
-sos_collection = db["sos"]
+# Startup mode: "eager" sets up logging and MongoDB at import (the default), "background"
+# does it in a thread while the app starts serving, "lazy" waits for the first request
+FAST_START = os.getenv("FAST_START", "eager").lower()
+
+startup_timings = {}
+startup_errors = {}
+_startup_lock = threading.RLock()
+_sos_collection = None
+_logging_ready = False
+
+def setup_logging():
+    """Create the log directory and attach the rotating file handler"""
+    global _logging_ready
+    with _startup_lock:
+        if _logging_ready:
+            return
+        started = time.perf_counter()
+        if not os.path.exists('logs'):
+            os.mkdir('logs')
+        file_handler = RotatingFileHandler('logs/sos_service.log', maxBytes=10240, backupCount=10)
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.setLevel(logging.INFO)
+        app.logger.info('SOS Verification Service started')
+        _logging_ready = True
+        startup_timings['logging'] = time.perf_counter() - started
+
+def get_sos_collection():
+    """MongoDB connection, created on first use"""
+    global _sos_collection
+    if _sos_collection is None:
+        with _startup_lock:
+            if _sos_collection is None:
+                started = time.perf_counter()
+                from pymongo import MongoClient
+                MONGODB_URI = os.getenv("MONGODB_URL")
+                client = MongoClient(MONGODB_URI)
+                db = client["WithU"]
+                _sos_collection = db["sos"]
+                startup_timings['mongodb'] = time.perf_counter() - started
+    return _sos_collection
+
+def warm_up(raise_errors=False):
+    """Set up logging and MongoDB, recording any failure so /ready can report it"""
+    for name, step in (('logging', setup_logging), ('mongodb', get_sos_collection)):
+        try:
+            step()
+            startup_errors.pop(name, None)
+        except Exception as e:
+            if raise_errors:
+                raise
+            startup_errors[name] = str(e)
+            app.logger.error(f"Error warming up {name}: {e}")
+
+@app.before_request
+def ensure_logging():
+    setup_logging()
 
 @app.route("/")
 def root():
     app.logger.info('Root endpoint accessed')
     return jsonify({"message": "SOS Verification Service is running"})
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness probe: 200 once logging and MongoDB are set up, 503 while still warming up"""
+    is_ready = FAST_START == "lazy" or (_logging_ready and _sos_collection is not None)
+    return jsonify({
+        "ready": is_ready,
+        "mode": FAST_START,
+        "timings": startup_timings,
+        "errors": startup_errors
+    }), 200 if is_ready else 503
+
 @app.route("/api/verify_sos", methods=["POST"])
 def verify_sos():
     data = request.get_json()
@@ -57,7 +112,7 @@ def verify_sos():
 # Convert to MongoDB-compatible ISO format
         iso_time = time_threshold.isoformat(timespec='milliseconds')
         print(iso_time)  # Example: '2025-04-13T04:15:05.131+00:00'
-        recent_sos = sos_collection.find_one({
+        recent_sos = get_sos_collection().find_one({
             "owner_id": user_id,
             "createdAt": {"$gte": time_threshold},  # ✅ FIXED here
             "status": {"$in": ["resolved", "pending", "accepted"]}
@@ -90,7 +145,7 @@ def check_recent_sos(user_id):
     app.logger.info(f"Checking recent SOS for user {user_id}")
     try:
         time_threshold = datetime.utcnow() - timedelta(hours=12)
-        recent_sos = sos_collection.find_one({
+        recent_sos = get_sos_collection().find_one({
             "owner_id": user_id,
             "createdAt": {"$gte": time_threshold},
             "status": {"$in": ["pending", "accepted"]}
@@ -108,5 +163,10 @@ def check_recent_sos(user_id):
             "details": str(e)
         }), 500
 
+if FAST_START == "background":
+    threading.Thread(target=warm_up, name="sos-warm-up", daemon=True).start()
+elif FAST_START != "lazy":
+    warm_up(raise_errors=True)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
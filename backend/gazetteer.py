@@ -0,0 +1,270 @@
+import os
+import re
+import csv
+import json
+from datetime import datetime
+from collections import defaultdict
+
+TASMAC_CSV_PATH = "tasmac_locations.csv"
+INCIDENT_LAYER_PATH = "story_incidents.json"
+
+# How much each analyzed story adds to the risk around the places it mentions
+SEVERITY_WEIGHTS = {'Critical': 1.0, 'High': 0.7, 'Medium': 0.4, 'Low': 0.1}
+
+# Address components that say nothing about where in the city a place is
+IGNORED_COMPONENTS = {'india', 'tamil nadu', 'unknown', 'shop no'}
+
+# Street-type and filler words; a name made only of these (plus initials) is not a place
+GENERIC_WORDS = {
+    'road', 'rd', 'main', 'street', 'st', 'salai', 'lane', 'cross', 'high', 'highway', 'bypass',
+    'bus', 'stand', 'stop', 'junction', 'signal', 'bridge', 'circle', 'market', 'bazaar',
+    'near', 'opp', 'opposite', 'behind', 'unnamed', 'the', 'and', 'of', 'new', 'old',
+    'east', 'west', 'north', 'south', 'floor', 'shop', 'no', 'building', 'complex', 'tower',
+    'taluk', 'district', 'post', 'office', 'village', 'town', 'city', 'area', 'colony',
+}
+
+# Short names share most of their trigrams with unrelated places ("the" vs "theni"),
+# so fuzzy matches for them need a higher score
+SHORT_QUERY_CHARS = 6
+SHORT_QUERY_MIN_SCORE = 0.85
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name):
+    """Lowercase, strip punctuation and collapse whitespace: 'T. Nagar' -> 't nagar'"""
+    return _NON_ALNUM.sub(' ', str(name).lower()).strip()
+
+
+def is_generic(normalized):
+    """True for names like 'main road', 'bus stand' or 'r s' that do not identify a place"""
+    return all(word in GENERIC_WORDS or len(word) <= 2 for word in normalized.split())
+
+
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """Offline place-name index: exact lookups through a trie, fuzzy ones through a trigram index"""
+
+    def __init__(self, preferred_city="Chennai"):
+        # Names like "Anna Nagar" exist in several towns; only places in this city are returned
+        # (None accepts any city, preferring the one with the most occurrences)
+        self.preferred_city = preferred_city
+        self.entries = []
+        self.trie = {}
+        self.trigram_index = defaultdict(set)
+        self._cache = {}
+
+    def add_place(self, name, lat, lng, source, city=''):
+        """Add one named coordinate; repeated names within a city are merged into their centroid"""
+        normalized = normalize_name(name)
+        if not normalized or normalized in IGNORED_COMPONENTS or is_generic(normalized):
+            return
+
+        node = self.trie
+        for ch in normalized:
+            node = node.setdefault(ch, {})
+
+        if '$' in node:
+            entry = self.entries[node['$']]
+        else:
+            node['$'] = len(self.entries)
+            entry = {
+                'name': name.strip(),
+                'normalized': normalized,
+                'cities': {},
+                'source': source,
+                'gram_count': len(trigrams(normalized)),
+            }
+            self.entries.append(entry)
+            for gram in trigrams(normalized):
+                self.trigram_index[gram].add(node['$'])
+
+        sums = entry['cities'].setdefault(city, [0.0, 0.0, 0])
+        sums[0] += lat
+        sums[1] += lng
+        sums[2] += 1
+        self._cache.clear()
+
+    def load_tasmac_csv(self, path=TASMAC_CSV_PATH):
+        """
+        Index the localities named in the TASMAC addresses at the shop's coordinates. The town
+        (the component before the state, else the City column) only tags the entry's city; it is
+        not indexed itself, since a story mentioning "Chennai" says nothing about where in it.
+        """
+        with open(path, encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lng = float(row['Latitude']), float(row['Longitude'])
+                except (TypeError, ValueError):
+                    continue
+                components = [c.strip() for c in (row.get('Address') or '').split(',')]
+                city = _address_city(components) or (row.get('City') or '').strip()
+                skipped = {normalize_name(city), normalize_name(row.get('City') or '')}
+                for component in components:
+                    # Skip plus codes, door numbers, pin codes and road numbers
+                    if not component or any(ch.isdigit() for ch in component):
+                        continue
+                    if normalize_name(component) in skipped:
+                        continue
+                    self.add_place(component, lat, lng, 'tasmac', city=city)
+        return self
+
+    def load_osm_places(self, path, default_city=None):
+        """
+        Index an OSM place export (CSV, or TSV such as OSMNames). Needs a 'name' column and
+        'lat'/'latitude' plus 'lon'/'lng'/'longitude' columns; an optional 'city' column is used
+        to disambiguate repeated names. Rows without a city get default_city, which defaults to
+        the preferred city on the assumption that the export is an extract of it.
+        """
+        default_city = default_city or self.preferred_city or ''
+        delimiter = '\t' if path.endswith(('.tsv', '.tsv.txt')) else ','
+        with open(path, encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter=delimiter):
+                lat = row.get('lat') or row.get('latitude')
+                lng = row.get('lon') or row.get('lng') or row.get('longitude')
+                try:
+                    self.add_place(row.get('name') or '', float(lat), float(lng), 'osm', city=row.get('city') or default_city)
+                except (TypeError, ValueError):
+                    continue
+        return self
+
+    def _entry_result(self, index, score):
+        entry = self.entries[index]
+        cities = entry['cities']
+        if self.preferred_city in cities:
+            city = self.preferred_city
+        elif self.preferred_city:
+            return None  # Only known in other towns, which are not what the stories refer to
+        else:
+            city = max(cities, key=lambda c: cities[c][2])
+        lat_sum, lng_sum, count = cities[city]
+        return {
+            'name': entry['name'],
+            'lat': lat_sum / count,
+            'lng': lng_sum / count,
+            'city': city,
+            'score': score,
+            'source': entry['source'],
+        }
+
+    def _exact(self, normalized):
+        node = self.trie
+        for ch in normalized:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node.get('$')
+
+    def geocode(self, name, min_score=0.6):
+        """Resolve a free-text place name to {'name', 'lat', 'lng', 'city', 'score', 'source'} or None"""
+        normalized = normalize_name(name)
+        if not normalized or normalized in IGNORED_COMPONENTS or is_generic(normalized):
+            return None
+        if normalized in self._cache:
+            return self._cache[normalized]
+
+        index = self._exact(normalized)
+        if index is not None:
+            result = self._entry_result(index, 1.0)
+        else:
+            # Dice similarity over character trigrams, counted only for entries sharing a trigram
+            query = trigrams(normalized)
+            shared = defaultdict(int)
+            for gram in query:
+                for candidate in self.trigram_index.get(gram, ()):
+                    shared[candidate] += 1
+
+            if len(normalized) < SHORT_QUERY_CHARS:
+                min_score = max(min_score, SHORT_QUERY_MIN_SCORE)
+            scored = []
+            for candidate, overlap in shared.items():
+                score = 2 * overlap / (len(query) + self.entries[candidate]['gram_count'])
+                if score >= min_score:
+                    scored.append((score, candidate))
+            # Best-scoring candidate that is in the preferred city
+            result = None
+            for score, candidate in sorted(scored, reverse=True):
+                result = self._entry_result(candidate, score)
+                if result is not None:
+                    break
+
+        self._cache[normalized] = result
+        return result
+
+    def geocode_stories(self, analyzed_stories, min_score=0.6):
+        """
+        Turn analyzed stories into incident points, merging stories that resolve to the same place.
+        Near-duplicates (stories with duplicate_of) are listed in story_ids but add no weight.
+        """
+        points = {}
+        matched = unmatched = 0
+        for story in analyzed_stories:
+            weight = SEVERITY_WEIGHTS.get(story.get('severity_level'), SEVERITY_WEIGHTS['Low'])
+            # A repost is listed at its places but does not add risk again
+            duplicate = bool(story.get('duplicate_of'))
+            for location in story.get('locations', []):
+                match = self.geocode(location, min_score=min_score)
+                if not match:
+                    if location != "Unknown":
+                        unmatched += 1
+                    continue
+                matched += 1
+                key = (round(match['lat'], 6), round(match['lng'], 6))
+                point = points.setdefault(key, {
+                    'lat': key[0],
+                    'lng': key[1],
+                    'place': match['name'],
+                    'weight': 0.0,
+                    'count': 0,
+                    'story_ids': [],
+                })
+                if not duplicate:
+                    point['weight'] += weight
+                    point['count'] += 1
+                point['story_ids'].append(story.get('id'))
+
+        print(f"Geocoded {matched} story locations ({unmatched} unmatched) into {len(points)} incident points")
+        return list(points.values())
+
+
+def _address_city(components):
+    """Town of a Google-style address: the component just before 'Tamil Nadu <pin>'"""
+    for i, component in enumerate(components):
+        if normalize_name(component).startswith('tamil nadu'):
+            if i > 0 and components[i - 1] and not any(ch.isdigit() for ch in components[i - 1]):
+                return components[i - 1]
+            return None
+    return None
+
+
+def build_gazetteer(tasmac_path=TASMAC_CSV_PATH, osm_path=None, preferred_city="Chennai"):
+    """Gazetteer from the TASMAC CSV plus an optional OSM place dump"""
+    gazetteer = Gazetteer(preferred_city=preferred_city)
+    if os.path.exists(tasmac_path):
+        gazetteer.load_tasmac_csv(tasmac_path)
+    else:
+        print(f"TASMAC CSV file not found at {tasmac_path}")
+    if osm_path:
+        gazetteer.load_osm_places(osm_path)
+    return gazetteer
+
+
+def export_incident_layer(points, path=INCIDENT_LAYER_PATH):
+    """Write the weighted incident points for safe_route to load, atomically since it may be reading them"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'), 'points': points}, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_incident_layer(path=INCIDENT_LAYER_PATH):
+    """Read an exported incident layer; returns [] when none has been exported yet"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('points', [])
@@ -0,0 +1,295 @@
+"""
+Checkpointed, resumable runner around StoryAnalyzer.
+
+    python job_runner.py                 # bulk run, resuming an interrupted one if present
+    python job_runner.py --watch         # keep analyzing new stories in small batches
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from story_analysis import StoryAnalyzer, SummaryAccumulator
+
+CHECKPOINT_DIR = 'checkpoints'
+LEASE_COLLECTION = 'analysis_leases'
+
+
+class LeaseError(Exception):
+    """Raised when another run already holds the job's lease"""
+
+
+class CommittedAnalyses:
+    """Re-iterable view of a job's analyses file, streamed from disk on every pass"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class JobLease:
+    """Time-limited lease stored in MongoDB so that only one run of a job is active at a time"""
+
+    def __init__(self, collection, job_name, ttl_seconds=300):
+        self.collection = collection
+        self.job_name = job_name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lost = None
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def acquire(self):
+        """Take the lease if it is free, expired or already ours; raises LeaseError otherwise"""
+        now = datetime.now(timezone.utc)
+        try:
+            # The filter only matches a lease we may take; if someone else holds it the
+            # upsert tries to insert a second document with the same _id and fails
+            self.collection.find_one_and_update(
+                {'_id': self.job_name, '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + self.ttl, 'renewed_at': now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            holder = self.collection.find_one({'_id': self.job_name}) or {}
+            raise LeaseError(f"Job '{self.job_name}' is already running on {holder.get('owner')} "
+                             f"(lease expires {holder.get('expires_at')})")
+
+    def renew(self):
+        self.acquire()
+
+    def start_heartbeat(self):
+        """Renew the lease from a background thread every third of its TTL, so long stages keep it"""
+        self.lost = None
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name=f'lease-{self.job_name}', daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self):
+        interval = self.ttl.total_seconds() / 3
+        while not self._stop.wait(interval):
+            try:
+                self.renew()
+            except LeaseError as e:
+                self.lost = e
+                return
+            except Exception as e:
+                # A transient database error; the lease is still ours until it expires
+                print(f"Error renewing lease for job '{self.job_name}': {e}")
+
+    def ensure_held(self):
+        """Raise LeaseError if the heartbeat found that another run has taken the lease"""
+        if self.lost is not None:
+            raise self.lost
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        self.collection.delete_one({'_id': self.job_name, 'owner': self.owner})
+
+
+class AnalysisJobRunner:
+    """
+    Processes stories in _id order in small batches. After every batch the analyses are
+    appended to a JSONL file and a checkpoint records the last processed _id, the running
+    summary aggregates and how much of the JSONL file is committed, so a crashed or
+    rate-limited run resumes exactly where it stopped.
+    """
+
+    def __init__(self, analyzer, job_name='story_analysis', batch_size=50,
+                 checkpoint_dir=CHECKPOINT_DIR, lease_ttl=300, refresh_interval=300):
+        self.analyzer = analyzer
+        self.job_name = job_name
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.checkpoint_path = os.path.join(checkpoint_dir, f'{job_name}.json')
+        self.analyses_path = os.path.join(checkpoint_dir, f'{job_name}.analyses.jsonl')
+        self.lease = JobLease(analyzer.db[LEASE_COLLECTION], job_name, ttl_seconds=lease_ttl)
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, checkpoint):
+        checkpoint['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _new_checkpoint(self):
+        # Start with an empty analyses file so a fresh run never mixes in older output
+        open(self.analyses_path, 'w').close()
+        return {
+            'job_name': self.job_name,
+            'status': 'running',
+            'last_id': None,
+            'processed': 0,
+            'analyses_offset': 0,
+            'aggregates': SummaryAccumulator().state(),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def _resume_checkpoint(self, checkpoint):
+        # Drop analyses written after the last checkpoint; those stories will be redone
+        if os.path.exists(self.analyses_path):
+            with open(self.analyses_path, 'r+b') as f:
+                f.truncate(checkpoint['analyses_offset'])
+        print(f"Resuming job '{self.job_name}' after {checkpoint['processed']} stories (last _id {checkpoint['last_id']})")
+        return checkpoint
+
+    def _fetch_batch(self, last_id):
+        query = {}
+        if last_id is not None:
+            query['_id'] = {'$gt': ObjectId(last_id) if ObjectId.is_valid(last_id) else last_id}
+        return list(self.analyzer.collection.find(query).sort('_id', 1).limit(self.batch_size))
+
+    def _process_batch(self, checkpoint, accumulator, stories):
+        analyses = self.analyzer.content_analysis(stories)
+        accumulator.add_all(analyses)
+
+        with open(self.analyses_path, 'a', encoding='utf-8') as f:
+            for analysis in analyses:
+                f.write(json.dumps(analysis, default=str, ensure_ascii=False) + '\n')
+            checkpoint['analyses_offset'] = f.tell()
+
+        checkpoint['last_id'] = str(stories[-1]['_id'])
+        checkpoint['processed'] += len(stories)
+        checkpoint['aggregates'] = accumulator.state()
+        self.lease.ensure_held()
+        self._save_checkpoint(checkpoint)
+
+    def _drain(self, checkpoint, accumulator):
+        """Process batches until no stories remain after the checkpoint; returns how many were processed"""
+        processed = 0
+        while True:
+            stories = self._fetch_batch(checkpoint['last_id'])
+            if not stories:
+                return processed
+            self._process_batch(checkpoint, accumulator, stories)
+            processed += len(stories)
+            print(f"Checkpoint: {checkpoint['processed']} stories processed (last _id {checkpoint['last_id']})")
+
+    def _start(self, resume=True, statuses=('running', 'watching')):
+        checkpoint = self.load_checkpoint()
+        if resume and checkpoint and checkpoint.get('status') in statuses:
+            checkpoint = self._resume_checkpoint(checkpoint)
+        else:
+            checkpoint = self._new_checkpoint()
+        self._seed_dedup_analyses()
+        return checkpoint, SummaryAccumulator(checkpoint['aggregates'])
+
+    def _seed_dedup_analyses(self):
+        """Let near-duplicates reuse analyses committed by earlier batches instead of re-analyzing them"""
+        index = self.analyzer.dedup_index
+        if index is None or not os.path.exists(self.analyses_path):
+            return
+        for analysis in CommittedAnalyses(self.analyses_path):
+            story_id = analysis.get('id')
+            if not analysis.get('duplicate_of') and index.canonical.get(story_id) == story_id:
+                index.analyses[story_id] = analysis
+
+    def _refresh_outputs(self):
+        """Rewrite the exports and the incident layer from every committed analysis"""
+        self.lease.ensure_held()
+        analyses = CommittedAnalyses(self.analyses_path)
+        self.analyzer.export_analyses(analyses)
+        self.lease.ensure_held()
+        self.analyzer.geocode_locations(analyses)
+
+    def run(self, resume=True):
+        """Bulk run: analyze everything after the checkpoint, then build the report"""
+        self.lease.acquire()
+        self.lease.start_heartbeat()
+        try:
+            checkpoint, accumulator = self._start(resume)
+            self._drain(checkpoint, accumulator)
+
+            if checkpoint['processed'] == 0:
+                print("No stories found in database")
+                return None
+
+            summary_stats = accumulator.summary()
+            analyses = CommittedAnalyses(self.analyses_path)
+            viz_paths = self.analyzer.create_visualizations(summary_stats, analyses)
+            self.lease.ensure_held()
+            report_paths = self.analyzer.generate_pdf_report(analyses, summary_stats, viz_paths)
+            self._refresh_outputs()
+
+            self.lease.ensure_held()
+            checkpoint['status'] = 'complete'
+            self._save_checkpoint(checkpoint)
+            return report_paths
+        finally:
+            self.lease.release()
+
+    def watch(self, poll_interval=30):
+        """
+        Continuously analyze new stories in small batches as they arrive, refreshing the exports
+        and the incident layer at most every refresh_interval seconds while there are new analyses
+        """
+        self.lease.acquire()
+        self.lease.start_heartbeat()
+        try:
+            # Pick up after a completed bulk run rather than reanalyzing everything
+            checkpoint, accumulator = self._start(resume=True, statuses=('running', 'watching', 'complete'))
+            checkpoint['status'] = 'watching'
+            print(f"Watching for new stories every {poll_interval}s (batch size {self.batch_size})")
+            stale = False
+            last_refresh = 0
+            while True:
+                stale = self._drain(checkpoint, accumulator) > 0 or stale
+                if stale and time.monotonic() - last_refresh >= self.refresh_interval:
+                    self._refresh_outputs()
+                    stale = False
+                    last_refresh = time.monotonic()
+                self.lease.ensure_held()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("Stopping watch mode")
+        finally:
+            self.lease.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpointed story analysis runner")
+    parser.add_argument('--watch', action='store_true', help='keep analyzing new stories as they arrive')
+    parser.add_argument('--fresh', action='store_true', help='ignore any existing checkpoint')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--poll-interval', type=int, default=30)
+    parser.add_argument('--refresh-interval', type=int, default=300,
+                        help='in watch mode, seconds between refreshes of the exports and incident layer')
+    parser.add_argument('--job-name', default='story_analysis')
+    args = parser.parse_args()
+
+    analyzer = StoryAnalyzer()
+    analyzer.enable_dedup()
+    analyzer.enable_pre_classifier()
+    runner = AnalysisJobRunner(analyzer, job_name=args.job_name, batch_size=args.batch_size,
+                               refresh_interval=args.refresh_interval)
+
+    try:
+        if args.watch:
+            runner.watch(poll_interval=args.poll_interval)
+        else:
+            report_paths = runner.run(resume=not args.fresh)
+            if report_paths:
+                print(f"Report successfully generated at: {', '.join(report_paths)}")
+    except LeaseError as e:
+        print(e)
@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import hashlib
+from collections import deque
+
+SEVERITY_LEVELS = ['Critical', 'High', 'Medium', 'Low']
+
+NEGATIVE_KEYWORDS = ['urgent', 'emergency', 'critical', 'danger', 'severe', 'serious', 'harm', 'risk', 'threat']
+
+# Compiled once at import instead of for every story
+LOCATION_PATTERNS = [
+    re.compile(r'in ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'),
+    re.compile(r'at ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'),
+    re.compile(r'from ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'),
+]
+
+LABEL_CACHE_PATH = 'llm_labels.jsonl'
+CLASSIFIER_PATH = 'severity_classifier.pkl'
+# The label cache keeps story text for training, so bound both how many stories and how much of each
+LABEL_CACHE_MAX_ENTRIES = 20000
+LABEL_TEXT_MAX_CHARS = 2000
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every keyword occurring in a text in a single pass"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].add(keyword)
+
+        # Breadth-first pass to build failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] |= self.output[self.fail[nxt]]
+
+    def find(self, text):
+        """Return the set of keywords that occur anywhere in text (substring match, like `in`)"""
+        found = set()
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+NEGATIVE_MATCHER = KeywordMatcher(NEGATIVE_KEYWORDS)
+
+
+def extract_locations(text):
+    """Capitalized place names following 'in', 'at' or 'from'"""
+    potential_locations = []
+    for pattern in LOCATION_PATTERNS:
+        for match in pattern.finditer(text):
+            potential_locations.append(match.group(1))
+    return list(set(potential_locations)) if potential_locations else ["Unknown"]
+
+
+def keyword_severity(text):
+    """Severity from the number of distinct negative keywords present"""
+    neg_count = len(NEGATIVE_MATCHER.find(text.lower()))
+    if neg_count >= 3:
+        severity = "Critical"
+    elif neg_count >= 2:
+        severity = "High"
+    elif neg_count >= 1:
+        severity = "Medium"
+    else:
+        severity = "Low"
+    return severity, neg_count
+
+
+def story_text(story):
+    return f"{story.get('title', '')} {story.get('description', '')}"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class LabelCache:
+    """
+    JSONL store of severity labels returned by the LLM, keyed by text hash. Only the newest
+    max_entries labels are kept, each with at most max_text_chars of story text, and the file
+    is rewritten once it holds twice as many lines as live entries.
+    """
+
+    def __init__(self, path=LABEL_CACHE_PATH, max_entries=LABEL_CACHE_MAX_ENTRIES,
+                 max_text_chars=LABEL_TEXT_MAX_CHARS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_text_chars = max_text_chars
+        self.labels = {}
+        self.lines = 0
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    self.lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Skip a torn final line from an interrupted run
+                    self._remember(entry)
+            if self.lines > len(self.labels):
+                self._compact()
+
+    def _remember(self, entry):
+        # Re-insert so dict order stays oldest-first, then drop the oldest past the limit
+        self.labels.pop(entry['text_hash'], None)
+        self.labels[entry['text_hash']] = entry
+        while len(self.labels) > self.max_entries:
+            del self.labels[next(iter(self.labels))]
+
+    def _compact(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.labels.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.labels)
+
+    def add(self, text, severity):
+        if severity not in SEVERITY_LEVELS:
+            return
+        key = text_hash(text)
+        if self.labels.get(key, {}).get('severity_level') == severity:
+            return
+        entry = {'text_hash': key, 'text': text[:self.max_text_chars], 'severity_level': severity}
+        self._remember(entry)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.lines += 1
+        if self.lines > 2 * max(len(self.labels), 1):
+            self._compact()
+
+    def get(self, text):
+        entry = self.labels.get(text_hash(text))
+        return entry['severity_level'] if entry else None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def training_data(self):
+        texts = [entry['text'] for entry in self.labels.values()]
+        labels = [entry['severity_level'] for entry in self.labels.values()]
+        return texts, labels
+
+
+class LocalSeverityClassifier:
+    """TF-IDF + logistic regression severity model trained on cached LLM labels"""
+
+    def __init__(self):
+        self.vectorizer = None
+        self.model = None
+        self.holdout_agreement = None
+        self.trained_on = 0
+
+    def fit(self, texts, labels, holdout=0.2, seed=42):
+        """Train on the labels, reporting agreement with the LLM on a held-out split"""
+        # scikit-learn is only needed once the local tier is enabled
+        from sklearn.model_selection import train_test_split
+
+        if len(set(labels)) < 2:
+            raise ValueError("Need labels from at least two severity levels to train")
+
+        if holdout and len(texts) >= 20:
+            train_x, test_x, train_y, test_y = train_test_split(texts, labels, test_size=holdout, random_state=seed)
+        else:
+            train_x, test_x, train_y, test_y = texts, [], labels, []
+
+        self._fit(train_x, train_y)
+        if test_x:
+            predicted, _ = self.predict_batch(test_x)
+            self.holdout_agreement = sum(p == y for p, y in zip(predicted, test_y)) / len(test_y)
+            # Refit on everything now that agreement has been measured
+            self._fit(texts, labels)
+        self.trained_on = len(texts)
+        return self
+
+    def _fit(self, texts, labels):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1, max_features=50000)
+        features = self.vectorizer.fit_transform(texts)
+        self.model = LogisticRegression(max_iter=1000)
+        self.model.fit(features, labels)
+
+    def predict_batch(self, texts):
+        """Return (labels, confidences) for a batch of texts in one vectorized pass"""
+        if not texts:
+            return [], []
+        probabilities = self.model.predict_proba(self.vectorizer.transform(texts))
+        best = probabilities.argmax(axis=1)
+        labels = [self.model.classes_[i] for i in best]
+        confidences = probabilities.max(axis=1).tolist()
+        return labels, confidences
+
+    def save(self, path=CLASSIFIER_PATH):
+        import joblib
+        joblib.dump({'vectorizer': self.vectorizer, 'model': self.model,
+                     'holdout_agreement': self.holdout_agreement, 'trained_on': self.trained_on}, path)
+
+    @classmethod
+    def load(cls, path=CLASSIFIER_PATH):
+        import joblib
+        data = joblib.load(path)
+        classifier = cls()
+        classifier.vectorizer = data['vectorizer']
+        classifier.model = data['model']
+        classifier.holdout_agreement = data.get('holdout_agreement')
+        classifier.trained_on = data.get('trained_on', 0)
+        return classifier
+
+
+class TieredClassifier:
+    """Decides locally when the classifier is confident and defers the rest to the LLM"""
+
+    def __init__(self, classifier, threshold=0.85):
+        self.classifier = classifier
+        self.threshold = threshold
+        self.local_decisions = 0
+        self.llm_calls = 0
+        self.compared = 0
+        self.agreed = 0
+
+    def split(self, stories):
+        """
+        Score a batch of stories. Returns (confident, ambiguous) where confident is a list
+        of (story, severity, confidence) and ambiguous is a list of (story, severity, confidence)
+        that should still go to the LLM.
+        """
+        labels, confidences = self.classifier.predict_batch([story_text(s) for s in stories])
+        confident, ambiguous = [], []
+        for story, label, confidence in zip(stories, labels, confidences):
+            if confidence >= self.threshold:
+                confident.append((story, label, confidence))
+            else:
+                ambiguous.append((story, label, confidence))
+        self.local_decisions += len(confident)
+        self.llm_calls += len(ambiguous)
+        return confident, ambiguous
+
+    def record_llm_label(self, local_label, llm_label):
+        """Track how often the local prediction matched the LLM on stories sent to it"""
+        if llm_label not in SEVERITY_LEVELS:
+            return
+        self.compared += 1
+        if local_label == llm_label:
+            self.agreed += 1
+
+    def report(self):
+        total = self.local_decisions + self.llm_calls
+        return {
+            'stories_scored': total,
+            'local_decisions': self.local_decisions,
+            'llm_calls': self.llm_calls,
+            'llm_call_rate': self.llm_calls / total if total else 0,
+            'agreement_on_llm_stories': self.agreed / self.compared if self.compared else None,
+            'holdout_agreement': self.classifier.holdout_agreement,
+            'threshold': self.threshold,
+        }
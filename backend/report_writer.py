@@ -0,0 +1,310 @@
+import os
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+FALLBACK_SUMMARY = "Simple fallback analysis due to LLM error"
+FALLBACK_IMPACT = "Analysis unavailable"
+
+# FPDF keeps every page of a document in memory until output(), so volumes are capped by default
+MAX_PAGES_PER_VOLUME = 100
+
+# Flat column layout shared by the CSV and Parquet exports
+EXPORT_COLUMNS = [
+    'id', 'author_id', 'title', 'severity_level', 'severity_explanation',
+    'locations', 'main_topics', 'key_entities',
+    'sentiment_negative', 'sentiment_neutral', 'sentiment_positive',
+    'word_count', 'audience_impact', 'summary', 'created_at', 'duplicate_of', 'analysis_source',
+]
+
+
+def sanitize_text(text):
+    """Replace anything outside Latin-1 with '?' so the core PDF fonts can render it"""
+    if not isinstance(text, str):
+        text = str(text)
+    return text.encode('latin-1', errors='replace').decode('latin-1')
+
+
+def iter_chunks(items, chunk_size):
+    """Yield lists of up to chunk_size items from any iterable without materializing it"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class PDFReportWriter:
+    """Writes the story report as one or more PDF volumes, flushing each volume to disk as it fills"""
+
+    def __init__(self, basename, max_pages_per_volume=MAX_PAGES_PER_VOLUME):
+        self.basename = basename
+        self.max_pages_per_volume = max_pages_per_volume
+        self.paths = []
+        self.pdf = None
+        self.font_name = 'Arial'
+        self.stories_in_volume = 0
+        self._new_volume()
+
+    def _volume_path(self, number):
+        if number == 1:
+            return f'{self.basename}.pdf'
+        return f'{self.basename}_vol{number}.pdf'
+
+    def _new_volume(self):
+        from fpdf import FPDF
+        self.pdf = FPDF()
+        self.stories_in_volume = 0
+
+        # Add a Unicode-compatible font (DejaVu supports broader character sets)
+        # Note: You'll need to download DejaVuSans.ttf and place it in your project directory
+        try:
+            self.pdf.add_font('DejaVu', '', 'DejaVuSans.ttf', uni=True)
+            self.font_name = 'DejaVu'
+        except Exception as e:
+            print(f"Failed to load DejaVu font: {e}. Falling back to Arial.")
+            self.font_name = 'Arial'  # Fallback to Arial if font is unavailable
+
+    def _flush_volume(self):
+        """Write the current volume to disk and release its pages"""
+        path = self._volume_path(len(self.paths) + 1)
+        self.pdf.output(path)
+        self.paths.append(path)
+        self.pdf = None
+
+    def write_front_matter(self, summary_stats, viz_paths, today):
+        """Title page, executive summary and charts"""
+        pdf = self.pdf
+        font_name = self.font_name
+
+        # Add title page
+        pdf.add_page()
+        pdf.set_font(font_name, 'B', 24)
+        pdf.cell(0, 30, 'Story Analysis Report', 0, 1, 'C')
+        pdf.set_font(font_name, 'I', 14)
+        pdf.cell(0, 10, f'Generated on {today}', 0, 1, 'C')
+        pdf.cell(0, 10, f'Total Stories Analyzed: {summary_stats["total_stories"]}', 0, 1, 'C')
+
+        # Add summary page
+        pdf.add_page()
+        pdf.set_font(font_name, 'B', 18)
+        pdf.cell(0, 20, 'Executive Summary', 0, 1, 'L')
+
+        pdf.set_font(font_name, '', 12)
+        summary_text = f'This report analyzes {summary_stats["total_stories"]} stories from the WithU database, using advanced AI text analysis to assess content severity, locations, topics, and sentiment.'
+        pdf.multi_cell(0, 10, sanitize_text(summary_text))
+
+        # Severity statistics
+        pdf.set_font(font_name, 'B', 14)
+        pdf.cell(0, 15, 'Severity Distribution', 0, 1, 'L')
+        pdf.set_font(font_name, '', 12)
+        for severity, count in summary_stats['severity_counts'].items():
+            percentage = (count / summary_stats["total_stories"] * 100) if summary_stats["total_stories"] > 0 else 0
+            text = f'{severity}: {count} stories ({percentage:.1f}%)'
+            pdf.cell(0, 10, sanitize_text(text), 0, 1)
+
+        # Location, topic and entity statistics
+        self._write_counts('Top Mentioned Locations', summary_stats['top_locations'], 'mentions')
+        self._write_counts('Top Story Topics', summary_stats['top_topics'], 'stories')
+        self._write_counts('Top Entities Mentioned', summary_stats['top_entities'], 'mentions')
+
+        # Average statistics
+        pdf.set_font(font_name, 'B', 14)
+        pdf.cell(0, 15, 'Content Statistics', 0, 1, 'L')
+        pdf.set_font(font_name, '', 12)
+        pdf.cell(0, 10, f'Average Word Count: {summary_stats["avg_word_count"]:.1f} words', 0, 1)
+        pdf.cell(0, 10, f'Average Negative Sentiment: {summary_stats["avg_sentiment"]["negative"]:.2f}', 0, 1)
+        pdf.cell(0, 10, f'Average Positive Sentiment: {summary_stats["avg_sentiment"]["positive"]:.2f}', 0, 1)
+        pdf.cell(0, 10, f'Average Neutral Sentiment: {summary_stats["avg_sentiment"]["neutral"]:.2f}', 0, 1)
+
+        # Near-duplicate clusters (reposted or lightly edited stories)
+        if summary_stats.get('duplicate_clusters'):
+            pdf.set_font(font_name, 'B', 14)
+            pdf.cell(0, 15, 'Duplicate Story Clusters', 0, 1, 'L')
+            pdf.set_font(font_name, '', 12)
+            pdf.multi_cell(0, 10, f'{summary_stats["duplicate_stories"]} near-duplicate stories reused the analysis of an earlier story and are not counted above.')
+            for canonical_id, duplicate_ids in list(summary_stats['duplicate_clusters'].items())[:10]:
+                text = f'Story {canonical_id}: {len(duplicate_ids)} duplicates'
+                pdf.cell(0, 10, sanitize_text(text), 0, 1)
+
+        # Add visualizations
+        for viz_path in viz_paths:
+            if os.path.exists(viz_path):
+                pdf.add_page()
+                pdf.set_font(font_name, 'B', 16)
+                title = viz_path.split('/')[-1].replace('_', ' ').replace('.png', '').title()
+                pdf.cell(0, 20, sanitize_text(title), 0, 1, 'C')
+                pdf.image(viz_path, x=25, w=160)
+
+    def _write_counts(self, heading, counts, unit):
+        if not counts:
+            return
+        self.pdf.set_font(self.font_name, 'B', 14)
+        self.pdf.cell(0, 15, heading, 0, 1, 'L')
+        self.pdf.set_font(self.font_name, '', 12)
+        for name, count in counts.items():
+            self.pdf.cell(0, 10, sanitize_text(f'{name}: {count} {unit}'), 0, 1)
+
+    def _start_story_section(self, continued=False):
+        self.pdf.add_page()
+        self.pdf.set_font(self.font_name, 'B', 18)
+        heading = 'Detailed Story Analysis'
+        if continued:
+            heading += f' (continued, volume {len(self.paths) + 1})'
+        self.pdf.cell(0, 20, heading, 0, 1, 'L')
+
+    def write_stories(self, analyzed_stories):
+        """Stream the per-story sections, starting a new volume whenever the page limit is reached"""
+        self._start_story_section()
+
+        for story in analyzed_stories:
+            if self._volume_full():
+                self._flush_volume()
+                self._new_volume()
+                self._start_story_section(continued=True)
+            elif self.stories_in_volume > 0 and self.stories_in_volume % 2 == 0:
+                self.pdf.add_page()
+            self._write_story(story)
+            self.stories_in_volume += 1
+
+    def _volume_full(self):
+        if not self.max_pages_per_volume or self.stories_in_volume == 0:
+            return False
+        return self.pdf.page_no() >= self.max_pages_per_volume
+
+    def _write_story(self, story):
+        pdf = self.pdf
+        font_name = self.font_name
+
+        pdf.set_font(font_name, 'B', 12)
+        pdf.cell(0, 10, f"Story: {sanitize_text(story['title'])}", 0, 1)
+
+        pdf.set_font(font_name, '', 10)
+        pdf.cell(0, 8, f"Author ID: {sanitize_text(str(story['author_id']))}", 0, 1)
+        pdf.cell(0, 8, f"Severity: {sanitize_text(story.get('severity_level', 'Unknown'))}", 0, 1)
+
+        # Format the locations as a string
+        locations = ', '.join(story.get('locations', ['Unknown']))
+        pdf.cell(0, 8, f"Locations: {sanitize_text(locations)}", 0, 1)
+
+        # Format the topics as a string
+        topics = ', '.join(story.get('main_topics', ['Unknown']))
+        pdf.cell(0, 8, f"Topics: {sanitize_text(topics)}", 0, 1)
+
+        pdf.cell(0, 8, f"Word Count: {story.get('word_count', 0)}", 0, 1)
+        pdf.cell(0, 8, f"Created: {sanitize_text(_format_date(story['created_at']))}", 0, 1)
+
+        if story.get('duplicate_of'):
+            pdf.cell(0, 8, f"Near-duplicate of story: {sanitize_text(story['duplicate_of'])}", 0, 1)
+
+        # Local-tier analyses have no LLM summary or impact to show
+        local = story.get('analysis_source') == 'local'
+
+        # Add summary if available
+        if 'summary' in story and story['summary'] != FALLBACK_SUMMARY and not local:
+            pdf.set_font(font_name, 'I', 10)
+            pdf.multi_cell(0, 8, f"Summary: {sanitize_text(story['summary'])}")
+
+        # Add audience impact if available
+        if 'audience_impact' in story and story['audience_impact'] != FALLBACK_IMPACT and not local:
+            pdf.set_font(font_name, '', 10)
+            pdf.multi_cell(0, 8, f"Impact: {sanitize_text(story['audience_impact'])}")
+
+        pdf.cell(0, 6, "", 0, 1)  # Spacing between stories
+
+    def close(self):
+        """Write out the last volume and return the paths of every volume written"""
+        if self.pdf is not None:
+            self._flush_volume()
+        return self.paths
+
+
+def _format_date(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def flatten_analysis(analysis):
+    """Flatten one story analysis into a row of EXPORT_COLUMNS"""
+    sentiment = analysis.get('sentiment') or {}
+    return {
+        'id': str(analysis.get('id', '')),
+        'author_id': str(analysis.get('author_id', '')),
+        'title': str(analysis.get('title', '')),
+        'severity_level': str(analysis.get('severity_level', '')),
+        'severity_explanation': str(analysis.get('severity_explanation', '')),
+        'locations': '; '.join(str(x) for x in analysis.get('locations', [])),
+        'main_topics': '; '.join(str(x) for x in analysis.get('main_topics', [])),
+        'key_entities': '; '.join(str(x) for x in analysis.get('key_entities', [])),
+        'sentiment_negative': float(sentiment.get('negative', 0) or 0),
+        'sentiment_neutral': float(sentiment.get('neutral', 0) or 0),
+        'sentiment_positive': float(sentiment.get('positive', 0) or 0),
+        'word_count': int(analysis.get('word_count', 0) or 0),
+        'audience_impact': str(analysis.get('audience_impact', '')),
+        'summary': str(analysis.get('summary', '')),
+        'created_at': _format_created_at(analysis.get('created_at')),
+        'duplicate_of': str(analysis.get('duplicate_of') or ''),
+        'analysis_source': str(analysis.get('analysis_source') or ''),
+    }
+
+
+def _format_created_at(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '' if value is None else str(value)
+
+
+def export_jsonl(analyzed_stories, path):
+    """Write one JSON document per line; nested fields are kept as-is"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for analysis in analyzed_stories:
+            f.write(json.dumps(analysis, default=str, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def export_csv(analyzed_stories, path):
+    """Write the flattened analyses as CSV"""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for analysis in analyzed_stories:
+            writer.writerow(flatten_analysis(analysis))
+            count += 1
+    return count
+
+
+def export_parquet(analyzed_stories, path, chunk_size=10000):
+    """Write the flattened analyses as Parquet, one row group per chunk (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (col, pa.float64() if col.startswith('sentiment_') else pa.int64() if col == 'word_count' else pa.string())
+        for col in EXPORT_COLUMNS
+    ])
+
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_chunks(analyzed_stories, chunk_size):
+            rows = [flatten_analysis(a) for a in chunk]
+            columns = {col: [row[col] for row in rows] for col in EXPORT_COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            count += len(rows)
+    return count
+
+
+EXPORTERS = {
+    'jsonl': export_jsonl,
+    'csv': export_csv,
+    'parquet': export_parquet,
+}
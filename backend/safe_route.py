@@ -1,14 +1,16 @@
-from flask import Flask, request, jsonify
-import joblib
+from flask import Flask, request, jsonify, Response, stream_with_context
 import numpy as np
-import openrouteservice as ors
-from openrouteservice.directions import directions
-import polyline
-import pandas as pd
-from sklearn.cluster import DBSCAN
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
 import os
+import json
+import time
+import threading
+from gazetteer import load_incident_layer, INCIDENT_LAYER_PATH
+
+# joblib, openrouteservice, polyline, pandas and scikit-learn are imported where they are
+# first used, so the service can start answering /ready before they are loaded
 
 app = Flask(__name__)
 
@@ -17,38 +19,155 @@ ORS_API_KEY = "<>"
 OPENCELLID_API_KEY = "<>"
 OPENCELLID_BASE_URL = "https://opencellid.org"
 TASMAC_CSV_PATH = "tasmac_locations.csv"  # Path to your CSV file
+RISK_MODEL_PATH = "risk_model.pkl"
+INCIDENT_RADIUS = 0.005  # ~500m around places mentioned in analyzed stories
+INCIDENT_WEIGHT = 0.2
+MAX_BATCH_PAIRS = 500
+ROUTE_FETCH_WORKERS = 8
+NETWORK_LOOKUP_WORKERS = 16
+# Point risks are memoized on coordinates rounded to this many decimals (5 is ~1m)
+RISK_CACHE_PRECISION = int(os.getenv("RISK_CACHE_PRECISION", "5"))
+RISK_CACHE_SIZE = int(os.getenv("RISK_CACHE_SIZE", "100000"))  # 0 disables the cache
+# Cached risks include live OpenCellID signal strength, so entries expire after this many seconds
+RISK_CACHE_TTL = float(os.getenv("RISK_CACHE_TTL", "3600"))
+# How often to check the model and data files for changes (which reloads them and clears the cache)
+ARTIFACT_CHECK_INTERVAL = float(os.getenv("ARTIFACT_CHECK_INTERVAL", "30"))
+
+# Startup mode: "eager" loads everything at import (the default), "background" starts
+# serving immediately and warms up in a thread, "lazy" loads each artifact on first use
+FAST_START = os.getenv("FAST_START", "eager").lower()
 
-# Load models and data
-predictor = joblib.load("risk_model.pkl")
-gmm = predictor['gmm']
-scaler = predictor['scaler']
-ors_client = ors.Client(key=ORS_API_KEY)
+def load_risk_model():
+    """Load the GMM risk model and its scaler"""
+    import joblib
+    predictor = joblib.load(RISK_MODEL_PATH)
+    return {'gmm': predictor['gmm'], 'scaler': predictor['scaler']}
+
+def load_ors_client():
+    import openrouteservice as ors
+    return ors.Client(key=ORS_API_KEY)
 
 def load_tasmac_locations():
-    """Load TASMAC locations from CSV file"""
-    try:
-        if not os.path.exists(TASMAC_CSV_PATH):
-            print(f"TASMAC CSV file not found at {TASMAC_CSV_PATH}")
-            return []
-            
-        df = pd.read_csv(TASMAC_CSV_PATH)
-        tasmac_locations = []
-        
-        for _, row in df.iterrows():
-            tasmac_locations.append({
-                'lat': row['Latitude'],
-                'lng': row['Longitude'],
-                'name': row['Location Name'],
-                'address': row['Address']
-            })
+    """Load TASMAC locations from CSV file; a missing file means no TASMAC data, other errors are raised"""
+    if not os.path.exists(TASMAC_CSV_PATH):
+        print(f"TASMAC CSV file not found at {TASMAC_CSV_PATH}")
+        return []
         
-        return tasmac_locations
+    import pandas as pd
+    df = pd.read_csv(TASMAC_CSV_PATH)
+    tasmac_locations = []
+    
+    for _, row in df.iterrows():
+        tasmac_locations.append({
+            'lat': row['Latitude'],
+            'lng': row['Longitude'],
+            'name': row['Location Name'],
+            'address': row['Address']
+        })
+    
+    return tasmac_locations
+
+def load_incident_points():
+    """Load the geocoded story incident layer exported by story_analysis"""
+    try:
+        points = load_incident_layer(INCIDENT_LAYER_PATH)
+        print(f"Loaded {len(points)} story incident points")
+        return points
     except Exception as e:
-        print(f"Error loading TASMAC locations: {e}")
+        print(f"Error loading story incident layer: {e}")
         return []
 
-# Load TASMAC data at startup
-tasmac_locations = load_tasmac_locations()
+# Artifacts in warm-up order; each is loaded once, on first use or by warm_up()
+ARTIFACT_LOADERS = {
+    'risk_model': load_risk_model,
+    'ors_client': load_ors_client,
+    'tasmac_locations': load_tasmac_locations,
+    'tasmac_clusters': lambda: cluster_tasmac_locations(),
+    'incident_points': load_incident_points,
+}
+
+# Files each artifact is loaded from; a change to one reloads the artifact
+ARTIFACT_SOURCES = {
+    'risk_model': RISK_MODEL_PATH,
+    'tasmac_locations': TASMAC_CSV_PATH,
+    'incident_points': INCIDENT_LAYER_PATH,
+}
+
+_artifacts = {}
+_artifact_lock = threading.RLock()
+_artifact_mtimes = {}
+_last_artifact_check = 0.0
+startup_timings = {}
+startup_errors = {}
+model_version = 1
+
+def _source_mtime(name):
+    try:
+        return os.stat(ARTIFACT_SOURCES[name]).st_mtime_ns
+    except OSError:
+        return None
+
+def get_artifact(name):
+    """Return a loaded artifact, loading it now if it is not ready yet"""
+    if name in _artifacts:
+        return _artifacts[name]
+    with _artifact_lock:
+        if name not in _artifacts:
+            started = time.perf_counter()
+            if name in ARTIFACT_SOURCES:
+                _artifact_mtimes[name] = _source_mtime(name)
+            _artifacts[name] = ARTIFACT_LOADERS[name]()
+            startup_timings[name] = time.perf_counter() - started
+    return _artifacts[name]
+
+def warm_up(raise_errors=False):
+    """Load every artifact, recording how long each one took"""
+    for name in ARTIFACT_LOADERS:
+        try:
+            get_artifact(name)
+        except Exception as e:
+            if raise_errors:
+                raise
+            startup_errors[name] = str(e)
+            print(f"Error warming up {name}: {e}")
+
+def reload_artifacts(names=None):
+    """
+    Reload artifacts (all of them by default), e.g. after retraining the risk model or refreshing
+    the TASMAC or incident data. Bumps model_version, which invalidates memoized point risks.
+    Outside lazy mode the replacements are loaded straight away so /ready stays accurate.
+    """
+    global model_version
+    names = list(names or ARTIFACT_LOADERS)
+    if 'tasmac_locations' in names and 'tasmac_clusters' not in names:
+        names.append('tasmac_clusters')
+    with _artifact_lock:
+        for name in names:
+            _artifacts.pop(name, None)
+            _artifact_mtimes.pop(name, None)
+            startup_timings.pop(name, None)
+            startup_errors.pop(name, None)
+        model_version += 1
+        if FAST_START != "lazy":
+            warm_up()
+    return model_version
+
+def check_artifact_changes():
+    """Reload any loaded artifact whose source file changed; checked at most every ARTIFACT_CHECK_INTERVAL"""
+    global _last_artifact_check
+    now = time.monotonic()
+    if now - _last_artifact_check < ARTIFACT_CHECK_INTERVAL:
+        return []
+    _last_artifact_check = now
+    changed = [name for name in ARTIFACT_SOURCES
+               if name in _artifact_mtimes and _source_mtime(name) != _artifact_mtimes[name]]
+    if changed:
+        print(f"Reloading changed artifacts: {', '.join(changed)}")
+        reload_artifacts(changed)
+    return changed
+
+def is_ready():
+    return FAST_START == "lazy" or all(name in _artifacts for name in ARTIFACT_LOADERS)
 
 def get_cell_towers_in_area(bbox):
     """Fetch cell towers in a bounding box from OpenCellID"""
@@ -87,55 +206,59 @@ def calculate_network_strength(lat, lng, radius=0.0085):
         return None
 
 def cluster_tasmac_locations():
-    """Cluster TASMAC locations to identify high-density areas"""
-    try:
-        if not tasmac_locations:
-            return []
-            
-        coordinates = [[loc['lat'], loc['lng']] for loc in tasmac_locations]
-        
-        # Use DBSCAN to find clusters (eps in degrees, ~500m)
-        clustering = DBSCAN(eps=0.005, min_samples=2).fit(coordinates)
-        
-        # Add cluster labels to locations
-        for i, loc in enumerate(tasmac_locations):
-            loc['cluster'] = clustering.labels_[i]
-        
-        # Group by cluster and calculate centroids
-        clusters = defaultdict(list)
-        for loc in tasmac_locations:
-            if loc['cluster'] != -1:  # -1 means no cluster
-                clusters[loc['cluster']].append(loc)
+    """
+    Cluster TASMAC locations to identify high-density areas. Errors are raised rather than
+    swallowed so that warm-up records them and /ready reports the service as not ready.
+    """
+    from sklearn.cluster import DBSCAN
+
+    tasmac_locations = get_artifact('tasmac_locations')
+    if not tasmac_locations:
+        return []
         
-        # Calculate centroids for each cluster
-        centroids = []
-        for cluster_id, locations in clusters.items():
-            avg_lat = sum(loc['lat'] for loc in locations) / len(locations)
-            avg_lng = sum(loc['lng'] for loc in locations) / len(locations)
-            
-            centroids.append({
-                'lat': avg_lat,
-                'lng': avg_lng,
-                'count': len(locations),
-                'radius': 0.003 * len(locations),  # Dynamic radius based on cluster size
-                'shops': [{'name': loc['name'], 'address': loc['address']} for loc in locations]
-            })
+    coordinates = [[loc['lat'], loc['lng']] for loc in tasmac_locations]
+    
+    # Use DBSCAN to find clusters (eps in degrees, ~500m)
+    clustering = DBSCAN(eps=0.005, min_samples=2).fit(coordinates)
+    
+    # Add cluster labels to locations
+    for i, loc in enumerate(tasmac_locations):
+        loc['cluster'] = clustering.labels_[i]
+    
+    # Group by cluster and calculate centroids
+    clusters = defaultdict(list)
+    for loc in tasmac_locations:
+        if loc['cluster'] != -1:  # -1 means no cluster
+            clusters[loc['cluster']].append(loc)
+    
+    # Calculate centroids for each cluster
+    centroids = []
+    for cluster_id, locations in clusters.items():
+        avg_lat = sum(loc['lat'] for loc in locations) / len(locations)
+        avg_lng = sum(loc['lng'] for loc in locations) / len(locations)
         
-        return centroids
-    except Exception as e:
-        print(f"Error clustering TASMAC locations: {e}")
-        return []
+        centroids.append({
+            'lat': avg_lat,
+            'lng': avg_lng,
+            'count': len(locations),
+            'radius': 0.003 * len(locations),  # Dynamic radius based on cluster size
+            'shops': [{'name': loc['name'], 'address': loc['address']} for loc in locations]
+        })
+    
+    return centroids
 
 def calculate_point_risk(lat, lng):
     """Calculate comprehensive risk score for a specific point"""
     try:
         # 1. Calculate base risk from GMM model
-        point = scaler.transform([[lat, lng]])[0]
-        gmm_density = np.exp(gmm.score_samples([[lat, lng]]))
+        risk_model = get_artifact('risk_model')
+        point = risk_model['scaler'].transform([[lat, lng]])[0]
+        gmm_density = np.exp(risk_model['gmm'].score_samples([[lat, lng]]))
         base_risk = gmm_density[0]
         
         # 2. Check proximity to TASMAC clusters
-        tasmac_clusters = cluster_tasmac_locations()
+        # Clusters are computed once and reused for every point
+        tasmac_clusters = get_artifact('tasmac_clusters')
         tasmac_risk = 0
         nearby_shops = []
         
@@ -150,7 +273,14 @@ def calculate_point_risk(lat, lng):
                 if risk_contribution > 0.2:
                     nearby_shops.extend(cluster['shops'])
         
-        # 3. Incorporate network strength
+        # 3. Check proximity to places mentioned in analyzed stories
+        incident_risk = 0
+        for incident in get_artifact('incident_points'):
+            distance = np.sqrt((lat - incident['lat'])**2 + (lng - incident['lng'])**2)
+            if distance < INCIDENT_RADIUS:
+                incident_risk += incident['weight'] * (1 - (distance / INCIDENT_RADIUS))
+        
+        # 4. Incorporate network strength
         network_strength = calculate_network_strength(lat, lng)
         if network_strength is None:
             network_strength = -85  # Default average strength
@@ -160,12 +290,13 @@ def calculate_point_risk(lat, lng):
         network_factor = max(0, min(1, (-network_strength - 50) / 40))
         
         # Combine all factors with weights
-        total_risk = (0.6 * base_risk) + (0.3 * tasmac_risk) + (0.1 * network_factor)
+        total_risk = (0.6 * base_risk) + (0.3 * tasmac_risk) + (0.1 * network_factor) + (INCIDENT_WEIGHT * incident_risk)
         
         return {
             'total_risk': total_risk,
             'base_risk': base_risk,
             'tasmac_risk': tasmac_risk,
+            'incident_risk': incident_risk,
             'network_strength': network_strength,
             'nearby_tasmac_shops': nearby_shops[:3]  # Return max 3 nearby shops
         }
@@ -173,82 +304,404 @@ def calculate_point_risk(lat, lng):
         print(f"Error in calculate_point_risk: {e}")
         return None
 
+class PointRiskCache:
+    """
+    Thread-safe LRU cache of point risks, emptied whenever the model version changes. Entries
+    expire after ttl seconds because the network strength in them is live OpenCellID data.
+    """
+
+    def __init__(self, max_size=RISK_CACHE_SIZE, ttl=RISK_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (risk data, time stored)
+        self.lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _sync(self, version):
+        """Start over on a newer version; returns False if the caller is on an older one"""
+        if self.version is None or version > self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, key, version):
+        with self.lock:
+            if self._sync(version) and key in self.entries:
+                value, stored_at = self.entries[key]
+                if time.monotonic() - stored_at <= self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            # Results computed against an older model never make it into the cache
+            if not self._sync(version):
+                return
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'ttl_seconds': self.ttl,
+                'precision': RISK_CACHE_PRECISION,
+                'model_version': self.version
+            }
+
+point_risk_cache = PointRiskCache()
+
+def _round_point(lat, lng):
+    return (round(lat, RISK_CACHE_PRECISION), round(lng, RISK_CACHE_PRECISION))
+
+def _copy_risk(risk_data):
+    if risk_data is None:
+        return None
+    return dict(risk_data, nearby_tasmac_shops=list(risk_data['nearby_tasmac_shops']))
+
+def cached_point_risk(lat, lng):
+    """
+    calculate_point_risk at the coordinates rounded to RISK_CACHE_PRECISION, memoized.
+    Failed lookups (None) are not cached so they are retried next time. With the cache disabled
+    the exact coordinates are scored.
+    """
+    if point_risk_cache.max_size <= 0:
+        return calculate_point_risk(lat, lng)
+    version = model_version
+    key = _round_point(lat, lng)
+    risk_data = point_risk_cache.get(key, version)
+    if risk_data is None:
+        risk_data = calculate_point_risk(*key)
+        if risk_data is not None:
+            point_risk_cache.put(key, risk_data, version)
+    return _copy_risk(risk_data)
+
+def cached_points_risk(points):
+    """Batch counterpart of cached_point_risk: only points missing from the cache are scored"""
+    if point_risk_cache.max_size <= 0:
+        return calculate_points_risk(list(dict.fromkeys(points)))
+    version = model_version
+    keys = {point: _round_point(*point) for point in points}
+    found = {}
+    for key in set(keys.values()):
+        risk_data = point_risk_cache.get(key, version)
+        if risk_data is not None:
+            found[key] = risk_data
+    
+    computed = calculate_points_risk([key for key in set(keys.values()) if key not in found])
+    for key, risk_data in computed.items():
+        if risk_data is not None:
+            point_risk_cache.put(key, risk_data, version)
+            found[key] = risk_data
+    
+    return {point: _copy_risk(found.get(key)) for point, key in keys.items()}
+
+def fetch_candidate_routes(src, dest):
+    """Fetch the recommended, shortest and fastest walking routes as lists of [lng, lat] coordinates"""
+    coords = [
+        [src['longitude'], src['latitude']],
+        [dest['longitude'], dest['latitude']]
+    ]
+    
+    route_preferences = ['recommended', 'shortest', 'fastest']
+    routes = []
+    
+    for preference in route_preferences:
+        route = get_artifact('ors_client').directions(
+            coordinates=coords,
+            profile='foot-walking',
+            format='geojson',
+            preference=preference
+        )
+        routes.append(route['features'][0]['geometry']['coordinates'])
+    
+    return routes
+
+def select_safest_route(routes, point_risk):
+    """Score each candidate route with point_risk(lat, lng) and return the safest one"""
+    safest_route = None
+    lowest_risk = float('inf')
+    route_details = []
+    tasmac_warnings = set()
+    
+    for route in routes:
+        total_risk = 0
+        path = []
+        segment_risks = []
+        current_warnings = set()
+        
+        for coord in route:
+            lng, lat = coord
+            risk_data = point_risk(lat, lng)
+            if risk_data:
+                path.append((lat, lng))
+                total_risk += risk_data['total_risk']
+                segment_risks.append({
+                    'lat': lat,
+                    'lng': lng,
+                    'risk': risk_data['total_risk'],
+                    'network_strength': risk_data['network_strength'],
+                    'nearby_shops': risk_data['nearby_tasmac_shops']
+                })
+                
+                # Collect unique TASMAC warnings along route
+                for shop in risk_data['nearby_tasmac_shops']:
+                    current_warnings.add(f"{shop['name']} ({shop['address']})")
+        
+        if total_risk < lowest_risk:
+            lowest_risk = total_risk
+            safest_route = path
+            route_details = segment_risks
+            tasmac_warnings = current_warnings
+    
+    if not safest_route:
+        raise ValueError("No safe route found")
+    
+    import polyline
+    return {
+        'polyline': polyline.encode(safest_route),
+        'total_risk': lowest_risk,
+        'segments': route_details,
+        'tasmac_warnings': list(tasmac_warnings),
+        'route_stats': {
+            'tasmac_risk': sum(seg['risk'] * 0.3 for seg in route_details),
+            'network_risk': sum(seg['risk'] * 0.1 for seg in route_details),
+            'base_risk': sum(seg['risk'] * 0.6 for seg in route_details)
+        }
+    }
+
 def get_safe_route(src, dest):
     """Get the safest route considering TASMAC locations and network strength"""
     try:
         print("received")
-        coords = [
-            [src['longitude'], src['latitude']],
-            [dest['longitude'], dest['latitude']]
-        ]
+        routes = fetch_candidate_routes(src, dest)
+        route_data = select_safest_route(routes, cached_point_risk)
+        print(route_data['polyline'])
+        return route_data
+    
+    except Exception as e:
+        print(f"Error in get_safe_route: {e}")
+        return None
+
+def calculate_points_risk(points):
+    """
+    Score many (lat, lng) points in one vectorized pass. Returns a dict mapping each point to
+    the same result calculate_point_risk would give, or None where scoring failed.
+    """
+    if not points:
+        return {}
+    try:
+        coords = np.array(points, dtype=float)
+        lats, lngs = coords[:, 0], coords[:, 1]
+        
+        # 1. Base risk from the GMM model for all points at once
+        base_risks = np.exp(get_artifact('risk_model')['gmm'].score_samples(coords))
+        
+        # 2. Distances from every point to every TASMAC cluster centroid
+        tasmac_clusters = get_artifact('tasmac_clusters')
+        tasmac_contributions = _proximity_contributions(
+            lats, lngs, tasmac_clusters,
+            radius=np.array([c['radius'] for c in tasmac_clusters]),
+            weight=np.array([c['count'] * 0.5 for c in tasmac_clusters])
+        )
+        
+        # 3. Same for places mentioned in analyzed stories
+        incidents = get_artifact('incident_points')
+        incident_contributions = _proximity_contributions(
+            lats, lngs, incidents,
+            radius=np.full(len(incidents), INCIDENT_RADIUS),
+            weight=np.array([i['weight'] for i in incidents])
+        )
+        
+        # 4. Network strength is a remote lookup per point, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=NETWORK_LOOKUP_WORKERS) as executor:
+            strengths = list(executor.map(lambda p: calculate_network_strength(*p), points))
+    except Exception as e:
+        print(f"Error in calculate_points_risk, falling back to per-point scoring: {e}")
+        return {point: calculate_point_risk(*point) for point in points}
+    
+    results = {}
+    for i, point in enumerate(points):
+        # Accumulate in cluster order so totals match calculate_point_risk exactly
+        tasmac_risk = 0
+        nearby_shops = []
+        for j in np.nonzero(tasmac_contributions[i])[0]:
+            risk_contribution = tasmac_contributions[i, j]
+            tasmac_risk += risk_contribution
+            if risk_contribution > 0.2:
+                nearby_shops.extend(tasmac_clusters[j]['shops'])
         
-        route_preferences = ['recommended', 'shortest', 'fastest']
-        routes = []
+        incident_risk = 0
+        for j in np.nonzero(incident_contributions[i])[0]:
+            incident_risk += incident_contributions[i, j]
         
-        for preference in route_preferences:
-            route = ors_client.directions(
-                coordinates=coords,
-                profile='foot-walking',
-                format='geojson',
-                preference=preference
-            )
-            routes.append(route)
+        network_strength = strengths[i]
+        if network_strength is None:
+            network_strength = -85  # Default average strength
+        network_factor = max(0, min(1, (-network_strength - 50) / 40))
         
-        safest_route = None
-        lowest_risk = float('inf')
-        route_details = []
-        tasmac_warnings = set()
+        base_risk = base_risks[i]
+        total_risk = (0.6 * base_risk) + (0.3 * tasmac_risk) + (0.1 * network_factor) + (INCIDENT_WEIGHT * incident_risk)
         
-        for route in routes:
-            total_risk = 0
-            path = []
-            segment_risks = []
-            current_warnings = set()
+        results[point] = {
+            'total_risk': total_risk,
+            'base_risk': base_risk,
+            'tasmac_risk': tasmac_risk,
+            'incident_risk': incident_risk,
+            'network_strength': network_strength,
+            'nearby_tasmac_shops': nearby_shops[:3]
+        }
+    return results
+
+def _proximity_contributions(lats, lngs, centers, radius, weight):
+    """(points x centers) matrix of weight * (1 - distance / radius), zero outside the radius"""
+    if not centers:
+        return np.zeros((len(lats), 0))
+    center_lats = np.array([c['lat'] for c in centers])
+    center_lngs = np.array([c['lng'] for c in centers])
+    distance = np.sqrt((lats[:, None] - center_lats[None, :])**2 + (lngs[:, None] - center_lngs[None, :])**2)
+    return np.where(distance < radius, weight * (1 - (distance / radius)), 0.0)
+
+def _route_key(src, dest):
+    return (src['latitude'], src['longitude'], dest['latitude'], dest['longitude'])
+
+def iter_batch_safe_routes(pairs):
+    """
+    Yield one result per src/dest pair as soon as it is ready, plus a final summary. Identical
+    pairs share one set of candidate routes. Routes are scored in groups as they arrive: each
+    group is whatever finished fetching while the previous group was being scored, and every
+    distinct coordinate is scored only once across the whole batch.
+    """
+    started = time.perf_counter()
+    indices_by_key = defaultdict(list)
+    for index, pair in enumerate(pairs):
+        indices_by_key[_route_key(pair['src'], pair['dest'])].append(index)
+    
+    point_risks = {}
+    total_points = 0
+    executor = ThreadPoolExecutor(max_workers=ROUTE_FETCH_WORKERS)
+    try:
+        pending = {executor.submit(fetch_candidate_routes, pairs[indices[0]]['src'], pairs[indices[0]]['dest']): key
+                   for key, indices in indices_by_key.items()}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            group = {}
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    group[key] = future.result()
+                except Exception as e:
+                    print(f"Error fetching routes for {key}: {e}")
+                    for index in indices_by_key[key]:
+                        yield _batch_error(index, pairs[index], "Unable to fetch safe route")
             
-            for coord in route['features'][0]['geometry']['coordinates']:
-                lng, lat = coord
-                risk_data = calculate_point_risk(lat, lng)
-                if risk_data:
-                    path.append((lat, lng))
-                    total_risk += risk_data['total_risk']
-                    segment_risks.append({
-                        'lat': lat,
-                        'lng': lng,
-                        'risk': risk_data['total_risk'],
-                        'network_strength': risk_data['network_strength'],
-                        'nearby_shops': risk_data['nearby_tasmac_shops']
-                    })
-                    
-                    # Collect unique TASMAC warnings along route
-                    for shop in risk_data['nearby_tasmac_shops']:
-                        current_warnings.add(f"{shop['name']} ({shop['address']})")
+            # Score the group's coordinates that earlier groups have not already scored
+            new_points = {}
+            for routes in group.values():
+                for route in routes:
+                    total_points += len(route)
+                    for lng, lat in route:
+                        if (lat, lng) not in point_risks:
+                            new_points[(lat, lng)] = None
+            point_risks.update(cached_points_risk(list(new_points)))
             
-            if total_risk < lowest_risk:
-                lowest_risk = total_risk
-                safest_route = path
-                route_details = segment_risks
-                tasmac_warnings = current_warnings
-        
-        if safest_route:
-            encoded_polyline = polyline.encode(safest_route) 
-            print(encoded_polyline)
-            return {
-                'polyline': encoded_polyline,
-                'total_risk': lowest_risk,
-                'segments': route_details,
-                'tasmac_warnings': list(tasmac_warnings),
-                'route_stats': {
-                    'tasmac_risk': sum(seg['risk'] * 0.3 for seg in route_details),
-                    'network_risk': sum(seg['risk'] * 0.1 for seg in route_details),
-                    'base_risk': sum(seg['risk'] * 0.6 for seg in route_details)
-                }
-            }
-        else:
-            raise ValueError("No safe route found")
+            for key, routes in group.items():
+                try:
+                    route_data = select_safest_route(routes, lambda lat, lng: point_risks.get((lat, lng)))
+                except ValueError as ve:
+                    for index in indices_by_key[key]:
+                        yield _batch_error(index, pairs[index], str(ve))
+                    continue
+                for index in indices_by_key[key]:
+                    yield {
+                        "index": index,
+                        "id": pairs[index].get("id"),
+                        "safest_polyline": route_data['polyline'],
+                        "total_risk": route_data['total_risk'],
+                        "segments": route_data['segments'],
+                        "tasmac_warnings": route_data['tasmac_warnings'],
+                        "route_stats": route_data['route_stats']
+                    }
+    finally:
+        # The client may have disconnected; don't keep fetching routes nobody will read
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    except Exception as e:
-        print(f"Error in get_safe_route: {e}")
-        return None
+    yield {
+        "done": True,
+        "pairs": len(pairs),
+        "unique_pairs": len(indices_by_key),
+        "route_points": total_points,
+        "unique_points": len(point_risks),
+        "seconds": time.perf_counter() - started
+    }
+
+def _is_coordinate(point):
+    """True for a {'latitude', 'longitude'} dict holding finite numbers in range"""
+    if not isinstance(point, dict):
+        return False
+    lat, lng = point.get('latitude'), point.get('longitude')
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lat, lng)):
+        return False
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+def _batch_error(index, pair, message):
+    return {"index": index, "id": pair.get("id"), "error": message}
+
+@app.route("/ready", methods=["GET"])
+def api_ready():
+    """Readiness probe: 200 once the model and data are loaded, 503 while still warming up"""
+    ready = is_ready()
+    return jsonify({
+        "ready": ready,
+        "mode": FAST_START,
+        "loaded": [name for name in ARTIFACT_LOADERS if name in _artifacts],
+        "timings": startup_timings,
+        "errors": startup_errors
+    }), 200 if ready else 503
+
+@app.before_request
+def reload_changed_artifacts():
+    check_artifact_changes()
+
+@app.route("/reload_artifacts", methods=["POST"])
+def api_reload_artifacts():
+    """Reload the model and data files (all, or the names listed in "artifacts") and clear the risk cache"""
+    data = request.get_json(silent=True) or {}
+    names = data.get("artifacts")
+    if names is not None and (not isinstance(names, list) or not set(names) <= set(ARTIFACT_LOADERS)):
+        return jsonify({"error": f"artifacts must be a list of: {', '.join(ARTIFACT_LOADERS)}"}), 400
+    version = reload_artifacts(names)
+    return jsonify({"model_version": version, "errors": startup_errors})
+
+@app.route("/risk_cache_stats", methods=["GET"])
+def api_risk_cache_stats():
+    """Hit rate and size of the point-risk memo"""
+    return jsonify(point_risk_cache.stats())
 
 @app.route("/get_safe_route", methods=["POST"])
 def api_get_safe_route():
@@ -281,5 +734,32 @@ def api_get_safe_route():
     except Exception as e:
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
 
+@app.route("/get_safe_routes_batch", methods=["POST"])
+def api_get_safe_routes_batch():
+    """Safe routes for many src/dest pairs, streamed back as NDJSON (one JSON object per line)"""
+    data = request.json or {}
+    pairs = data.get("pairs")
+    
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({"error": "Missing pairs"}), 400
+    if len(pairs) > MAX_BATCH_PAIRS:
+        return jsonify({"error": f"At most {MAX_BATCH_PAIRS} pairs per batch"}), 400
+    # Validate everything up front: once streaming starts the status code can no longer change
+    for i, pair in enumerate(pairs):
+        if not isinstance(pair, dict) or not _is_coordinate(pair.get("src")) or not _is_coordinate(pair.get("dest")):
+            return jsonify({"error": f"Invalid format for source or destination in pair {i}: "
+                                     "latitude and longitude must be numbers in range"}), 400
+    
+    def generate():
+        for result in iter_batch_safe_routes(pairs):
+            yield json.dumps(result, default=float) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+if FAST_START == "background":
+    threading.Thread(target=warm_up, name="safe-route-warm-up", daemon=True).start()
+elif FAST_START != "lazy":
+    warm_up(raise_errors=True)
+
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=8000)
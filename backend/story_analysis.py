@@ -1,18 +1,111 @@
-import pymongo
-import pandas as pd
-import matplotlib.pyplot as plt
-from fpdf import FPDF
 from datetime import datetime
 import re
 import os
 import json
-from llama_index.llms.groq import Groq
+# pymongo, numpy (dedup), matplotlib (chart_renderer), fpdf and llama_index are imported on first use to keep startup fast
+from report_writer import PDFReportWriter, EXPORTERS, MAX_PAGES_PER_VOLUME, sanitize_text
+from gazetteer import build_gazetteer, export_incident_layer, INCIDENT_LAYER_PATH
+from local_classifier import (
+    LabelCache, LocalSeverityClassifier, TieredClassifier, CLASSIFIER_PATH,
+    extract_locations, keyword_severity, story_text,
+)
+
+class SummaryAccumulator:
+    """Running totals behind generate_summary_stats; serializable so long runs can checkpoint them"""
+    
+    def __init__(self, state=None):
+        state = state or {}
+        self.severity_counts = state.get('severity_counts', {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0})
+        self.locations = state.get('locations', {})
+        self.topics = state.get('topics', {})
+        self.entities = state.get('entities', {})
+        self.total_words = state.get('total_words', 0)
+        self.sentiment_sums = state.get('sentiment_sums', {'negative': 0, 'neutral': 0, 'positive': 0})
+        self.count = state.get('count', 0)
+        # Local-tier analyses carry placeholder sentiment, so they are not averaged in
+        self.sentiment_count = state.get('sentiment_count', self.count)
+        self.duplicate_clusters = state.get('duplicate_clusters', {})
+    
+    def add(self, story):
+        # Near-duplicates are reported as clusters rather than counted again
+        if story.get('duplicate_of'):
+            self.duplicate_clusters.setdefault(story['duplicate_of'], []).append(story['id'])
+            return
+        
+        self.count += 1
+        
+        # Count severities
+        severity = story.get('severity_level', 'Low')
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+        
+        # Count locations
+        for loc in story.get('locations', []):
+            if loc != "Unknown":
+                self.locations[loc] = self.locations.get(loc, 0) + 1
+        
+        # Count topics
+        for topic in story.get('main_topics', []):
+            if topic != "Topic analysis unavailable":
+                self.topics[topic] = self.topics.get(topic, 0) + 1
+                
+        # Count entities
+        for entity in story.get('key_entities', []):
+            if entity != "Entity analysis unavailable":
+                self.entities[entity] = self.entities.get(entity, 0) + 1
+        
+        # Sum words
+        self.total_words += story.get('word_count', 0)
+        
+        # Sum sentiments
+        if story.get('analysis_source') == 'local':
+            return
+        self.sentiment_count += 1
+        sentiment = story.get('sentiment', {'negative': 0, 'neutral': 0, 'positive': 0})
+        for key in self.sentiment_sums:
+            self.sentiment_sums[key] += sentiment.get(key, 0)
+    
+    def add_all(self, analyzed_stories):
+        for story in analyzed_stories:
+            self.add(story)
+    
+    def state(self):
+        return {
+            'severity_counts': self.severity_counts,
+            'locations': self.locations,
+            'topics': self.topics,
+            'entities': self.entities,
+            'total_words': self.total_words,
+            'sentiment_sums': self.sentiment_sums,
+            'count': self.count,
+            'sentiment_count': self.sentiment_count,
+            'duplicate_clusters': self.duplicate_clusters,
+        }
+    
+    def summary(self):
+        count = self.count
+        sentiment_count = self.sentiment_count
+        avg_sentiment = {key: value / sentiment_count if sentiment_count > 0 else 0
+                         for key, value in self.sentiment_sums.items()}
+        return {
+            'total_stories': count,
+            'severity_counts': dict(self.severity_counts),
+            'top_locations': dict(sorted(self.locations.items(), key=lambda x: x[1], reverse=True)[:5]),
+            'top_topics': dict(sorted(self.topics.items(), key=lambda x: x[1], reverse=True)[:5]),
+            'top_entities': dict(sorted(self.entities.items(), key=lambda x: x[1], reverse=True)[:5]),
+            'avg_word_count': self.total_words / count if count > 0 else 0,
+            'avg_sentiment': avg_sentiment,
+            'duplicate_stories': sum(len(ids) for ids in self.duplicate_clusters.values()),
+            'duplicate_clusters': dict(sorted(self.duplicate_clusters.items(), key=lambda x: len(x[1]), reverse=True))
+        }
 
 class StoryAnalyzer:
-    def __init__(self, db_uri="<>", db_name="WithU", collection_name="stories"):
-        """Initialize the StoryAnalyzer with MongoDB connection and Groq LLM"""
+    def __init__(self, db_uri="<>", db_name="WithU", collection_name="stories", client=None, llm=None):
+        """Initialize the StoryAnalyzer with MongoDB connection and Groq LLM (either can be injected)"""
         # Database connection
-        self.client = pymongo.MongoClient(db_uri)
+        if client is None:
+            import pymongo
+            client = pymongo.MongoClient(db_uri)
+        self.client = client
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
         
@@ -20,16 +113,69 @@ class StoryAnalyzer:
         self.llm_model_name = "llama-3.3-70b-versatile"
         self.api_key = "<>"
         
-        try:
-            self.llm = Groq(
-                model=self.llm_model_name,
-                api_key=self.api_key,
-                temperature=0.2  # Lower temperature for more consistent results
-            )
-            print("Groq LLM initialized successfully")
-        except Exception as e:
-            print(f"Error initializing Groq LLM: {str(e)}")
-            self.llm = None
+        if llm is not None:
+            self.llm = llm
+        else:
+            try:
+                from llama_index.llms.groq import Groq
+                self.llm = Groq(
+                    model=self.llm_model_name,
+                    api_key=self.api_key,
+                    temperature=0.2  # Lower temperature for more consistent results
+                )
+                print("Groq LLM initialized successfully")
+            except Exception as e:
+                print(f"Error initializing Groq LLM: {str(e)}")
+                self.llm = None
+        
+        # Severity labels returned by the LLM, used to train the local pre-classifier
+        self.label_cache = LabelCache()
+        self.pre_classifier = None
+        
+        # Near-duplicate index over story text, persisted between runs
+        self.dedup_index = None
+        
+    def enable_pre_classifier(self, threshold=0.85, model_path=CLASSIFIER_PATH, retrain=False, min_labels=50,
+                              min_agreement=0.9, retrain_growth=0.2):
+        """
+        Score stories locally first and only send low-confidence ones to the LLM. The saved model is
+        retrained once the label cache has grown by retrain_growth, and the tier stays off unless the
+        model agrees with the LLM on at least min_agreement of its held-out labels.
+        """
+        classifier = None
+        if os.path.exists(model_path) and not retrain:
+            classifier = LocalSeverityClassifier.load(model_path)
+            if len(self.label_cache) >= classifier.trained_on * (1 + retrain_growth) + 1:
+                print(f"Label cache grew from {classifier.trained_on} to {len(self.label_cache)} labels, retraining the local tier")
+                classifier = None
+        
+        if classifier is None:
+            if len(self.label_cache) < min_labels:
+                print(f"Only {len(self.label_cache)} cached LLM labels, need {min_labels} to train the local tier")
+                return False
+            texts, labels = self.label_cache.training_data()
+            try:
+                classifier = LocalSeverityClassifier().fit(texts, labels)
+            except ValueError as e:
+                print(f"Could not train local classifier: {e}")
+                return False
+            classifier.save(model_path)
+            print(f"Trained local classifier on {len(texts)} labels (holdout agreement: {classifier.holdout_agreement})")
+        
+        if classifier.holdout_agreement is None or classifier.holdout_agreement < min_agreement:
+            print(f"Local tier not enabled: holdout agreement {classifier.holdout_agreement} is below {min_agreement}")
+            return False
+        
+        self.pre_classifier = TieredClassifier(classifier, threshold=threshold)
+        return True
+        
+    def enable_dedup(self, path=None, threshold=0.8):
+        """Detect reposted or lightly edited stories and reuse the canonical story's analysis"""
+        from dedup import MinHashLSH, DEDUP_INDEX_PATH
+        path = path or DEDUP_INDEX_PATH
+        self.dedup_index = MinHashLSH.load(path, threshold=threshold)
+        self.dedup_index_path = path
+        print(f"Loaded near-duplicate index with {len(self.dedup_index.signatures)} stories")
         
     def extract_stories(self):
         """Extract all stories from the MongoDB collection"""
@@ -82,6 +228,8 @@ Be objective and accurate in your assessment. For severity, "Critical" means ext
                 else:
                     # If no JSON found, try again with a more structured approach
                     analysis = json.loads(str(response))
+                # Keep the LLM's label so the local tier can be trained on it
+                self.label_cache.add(full_text, analysis.get('severity_level'))
             except json.JSONDecodeError as e:
                 print(f"Failed to parse JSON from LLM response: {e}")
                 print(f"Raw response: {response}")
@@ -110,32 +258,10 @@ Be objective and accurate in your assessment. For severity, "Critical" means ext
         word_count = len(text.split())
         
         # Simple location extraction
-        location_patterns = [
-            r'in ([A-Z][a-z]+(?: [A-Z][a-z]+)*)', 
-            r'at ([A-Z][a-z]+(?: [A-Z][a-z]+)*)',
-            r'from ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'
-        ]
-        
-        potential_locations = []
-        for pattern in location_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                potential_locations.append(match.group(1))
-                
-        locations = list(set(potential_locations)) if potential_locations else ["Unknown"]
+        locations = extract_locations(text)
         
         # Simple severity calculation based on negative word counts
-        negative_words = ['urgent', 'emergency', 'critical', 'danger', 'severe', 'serious', 'harm', 'risk', 'threat']
-        neg_count = sum(1 for word in negative_words if word in text.lower())
-        
-        if neg_count >= 3:
-            severity = "Critical"
-        elif neg_count >= 2:
-            severity = "High"
-        elif neg_count >= 1:
-            severity = "Medium"
-        else:
-            severity = "Low"
+        severity, neg_count = keyword_severity(text)
             
         return {
             'id': str(story.get('_id')),
@@ -153,305 +279,172 @@ Be objective and accurate in your assessment. For severity, "Critical" means ext
             'created_at': story.get('createdAt', datetime.now())
         }
     
-    def content_analysis(self, stories):
+    def _local_analysis(self, story, severity, confidence):
+        """Analysis for a story the local classifier is confident about"""
+        analysis = self._simple_fallback_analysis(story)
+        analysis['severity_level'] = severity
+        analysis['severity_explanation'] = f"Local classifier prediction (confidence {confidence:.2f})"
+        analysis['summary'] = "Local pre-classifier analysis"
+        analysis['analysis_source'] = 'local'
+        return analysis
+    
+    def content_analysis(self, stories, batch_size=256):
         """Analyze stories for content insights using the LLM"""
-        analyzed_stories = []
+        if self.dedup_index is not None:
+            return self._deduplicated_content_analysis(stories, batch_size)
+        return self._analyze_stories(stories, batch_size)
+    
+    def _deduplicated_content_analysis(self, stories, batch_size):
+        """Analyze only canonical stories; near-duplicates reuse their canonical story's analysis"""
+        for story in stories:
+            self.dedup_index.add(str(story.get('_id')), story_text(story))
+        # Read canonicals only after every add: re-indexing an edited story can reassign the
+        # canonical of stories added before it in the same batch
+        canonical_ids = [self.dedup_index.canonical[str(story.get('_id'))] for story in stories]
+        
+        to_analyze = []
+        pending = set()
+        for story, canonical_id in zip(stories, canonical_ids):
+            story_id = str(story.get('_id'))
+            # Analyze when there is nothing to reuse yet, including unchanged stories from a crashed run
+            if canonical_id not in self.dedup_index.analyses and canonical_id not in pending:
+                if canonical_id == story_id:
+                    pending.add(story_id)
+                    to_analyze.append(story)
+        
+        # A duplicate whose canonical has no analysis and is not in this batch gets analyzed itself
+        for story, canonical_id in zip(stories, canonical_ids):
+            if canonical_id not in self.dedup_index.analyses and canonical_id not in pending:
+                pending.add(canonical_id)
+                to_analyze.append(story)
+        
+        reused = len(stories) - len(to_analyze)
+        print(f"Near-duplicate check: analyzing {len(to_analyze)} stories, reusing analyses for {reused}")
+        
+        for story, analysis in zip(to_analyze, self._analyze_stories(to_analyze, batch_size)):
+            canonical_id = self.dedup_index.canonical[str(story.get('_id'))]
+            self.dedup_index.analyses[canonical_id] = analysis
         
-        for i, story in enumerate(stories):
-            print(f"Analyzing story {i+1}/{len(stories)}: {story.get('title', 'No Title')}")
-            analysis = self.analyze_story_content(story)
+        analyzed_stories = []
+        for story, canonical_id in zip(stories, canonical_ids):
+            story_id = str(story.get('_id'))
+            analysis = dict(self.dedup_index.analyses[canonical_id])
+            # Reused analyses may have been read back from a job's analyses file, where dates are text
+            analysis['id'] = story_id
+            analysis['author_id'] = story.get('author_id')
+            analysis['title'] = story.get('title', 'No Title')
+            analysis['created_at'] = story.get('createdAt', datetime.now())
+            if canonical_id != story_id:
+                analysis['duplicate_of'] = canonical_id
             analyzed_stories.append(analysis)
-            
+        
+        self.dedup_index.save(self.dedup_index_path)
+        return analyzed_stories
+    
+    def _analyze_stories(self, stories, batch_size):
+        """Run the LLM (and the local tier, when enabled) over a list of stories"""
+        if self.pre_classifier is None or not self.llm:
+            analyzed_stories = []
+            
+            for i, story in enumerate(stories):
+                print(f"Analyzing story {i+1}/{len(stories)}: {story.get('title', 'No Title')}")
+                analysis = self.analyze_story_content(story)
+                analyzed_stories.append(analysis)
+                
+            return analyzed_stories
+        
+        # Tiered path: score each batch locally, send only the ambiguous stories to the LLM
+        analyzed_stories = []
+        for start in range(0, len(stories), batch_size):
+            batch = stories[start:start + batch_size]
+            confident, ambiguous = self.pre_classifier.split(batch)
+            results = {}
+            for story, severity, confidence in confident:
+                results[id(story)] = self._local_analysis(story, severity, confidence)
+            for story, severity, confidence in ambiguous:
+                print(f"Analyzing story with LLM (local confidence {confidence:.2f}): {story.get('title', 'No Title')}")
+                analysis = self.analyze_story_content(story)
+                # Only compare against real LLM labels, not keyword fallbacks
+                self.pre_classifier.record_llm_label(severity, self.label_cache.get(story_text(story)))
+                results[id(story)] = analysis
+            analyzed_stories.extend(results[id(story)] for story in batch)
+        
+        print(f"Local pre-classifier report: {self.pre_classifier.report()}")
         return analyzed_stories
     
     def generate_summary_stats(self, analyzed_stories):
         """Generate summary statistics from the analyzed stories"""
         if not analyzed_stories:
             return {}
-            
-        severity_counts = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
-        locations = {}
-        topics = {}
-        entities = {}
-        total_words = 0
-        avg_sentiment = {'negative': 0, 'neutral': 0, 'positive': 0}
         
-        for story in analyzed_stories:
-            # Count severities
-            severity = story.get('severity_level', 'Low')
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-            
-            # Count locations
-            for loc in story.get('locations', []):
-                if loc != "Unknown":
-                    locations[loc] = locations.get(loc, 0) + 1
-            
-            # Count topics
-            for topic in story.get('main_topics', []):
-                if topic != "Topic analysis unavailable":
-                    topics[topic] = topics.get(topic, 0) + 1
-                    
-            # Count entities
-            for entity in story.get('key_entities', []):
-                if entity != "Entity analysis unavailable":
-                    entities[entity] = entities.get(entity, 0) + 1
-            
-            # Sum words
-            total_words += story.get('word_count', 0)
-            
-            # Sum sentiments
-            sentiment = story.get('sentiment', {'negative': 0, 'neutral': 0, 'positive': 0})
-            for key in avg_sentiment:
-                avg_sentiment[key] += sentiment.get(key, 0)
-        
-        # Calculate averages
-        count = len(analyzed_stories)
-        for key in avg_sentiment:
-            avg_sentiment[key] = avg_sentiment[key] / count if count > 0 else 0
-            
-        return {
-            'total_stories': count,
-            'severity_counts': severity_counts,
-            'top_locations': dict(sorted(locations.items(), key=lambda x: x[1], reverse=True)[:5]),
-            'top_topics': dict(sorted(topics.items(), key=lambda x: x[1], reverse=True)[:5]),
-            'top_entities': dict(sorted(entities.items(), key=lambda x: x[1], reverse=True)[:5]),
-            'avg_word_count': total_words / count if count > 0 else 0,
-            'avg_sentiment': avg_sentiment
-        }
+        accumulator = SummaryAccumulator()
+        accumulator.add_all(analyzed_stories)
+        return accumulator.summary()
     
     def create_visualizations(self, summary_stats, analyzed_stories):
         """Create visualizations for the report"""
-        # Create directory for visualizations if it doesn't exist
-        os.makedirs('viz', exist_ok=True)
-        
-        viz_paths = []
-        
-        # 1. Severity Distribution Pie Chart
-        plt.figure(figsize=(8, 6))
-        labels = list(summary_stats['severity_counts'].keys())
-        sizes = list(summary_stats['severity_counts'].values())
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=['#FF5252', '#FFA726', '#FDD835', '#66BB6A'])
-        plt.axis('equal')
-        plt.title('Story Severity Distribution')
-        plt.savefig('viz/severity_distribution.png', bbox_inches='tight')
-        plt.close()
-        viz_paths.append('viz/severity_distribution.png')
-        
-        # 2. Top Locations Bar Chart
-        if summary_stats['top_locations']:
-            plt.figure(figsize=(10, 6))
-            locations = list(summary_stats['top_locations'].keys())
-            counts = list(summary_stats['top_locations'].values())
-            plt.bar(locations, counts, color='skyblue')
-            plt.xticks(rotation=45, ha='right')
-            plt.title('Top Mentioned Locations')
-            plt.xlabel('Location')
-            plt.ylabel('Count')
-            plt.tight_layout()
-            plt.savefig('viz/top_locations.png', bbox_inches='tight')
-            plt.close()
-            viz_paths.append('viz/top_locations.png')
-        
-        # 3. Top Topics Bar Chart
-        if summary_stats['top_topics']:
-            plt.figure(figsize=(10, 6))
-            topics = list(summary_stats['top_topics'].keys())
-            counts = list(summary_stats['top_topics'].values())
-            plt.bar(topics, counts, color='lightgreen')
-            plt.xticks(rotation=45, ha='right')
-            plt.title('Top Story Topics')
-            plt.xlabel('Topic')
-            plt.ylabel('Count')
-            plt.tight_layout()
-            plt.savefig('viz/top_topics.png', bbox_inches='tight')
-            plt.close()
-            viz_paths.append('viz/top_topics.png')
-        
-        # 4. Sentiment Analysis Radar Chart
-        if len(analyzed_stories) > 0:
-            # Create data for sentiment radar chart
-            sentiments = list(summary_stats['avg_sentiment'].keys())
-            values = list(summary_stats['avg_sentiment'].values())
-            
-            # Number of variables
-            N = len(sentiments)
-            
-            # What will be the angle of each axis in the plot
-            angles = [n / float(N) * 2 * 3.14159 for n in range(N)]
-            angles += angles[:1]  # Close the loop
-            
-            # Add the first value again to close the circle
-            values += values[:1]
-            
-            # Create the plot
-            fig = plt.figure(figsize=(8, 8))
-            ax = fig.add_subplot(111, polar=True)
-            
-            # Draw one axis per variable + add labels
-            plt.xticks(angles[:-1], sentiments)
-            
-            # Plot data
-            ax.plot(angles, values, linewidth=2, linestyle='solid')
-            
-            # Fill area
-            ax.fill(angles, values, alpha=0.25)
-            
-            # Add title
-            plt.title('Average Sentiment Analysis', size=15)
-            
-            # Save the chart
-            plt.savefig('viz/sentiment_analysis.png', bbox_inches='tight')
-            plt.close()
-            viz_paths.append('viz/sentiment_analysis.png')
-            
-        return viz_paths
+        from chart_renderer import build_chart_specs, render_charts
+        specs = build_chart_specs(summary_stats, analyzed_stories)
+        return render_charts({None: specs})[None]
+
+    def create_partitioned_visualizations(self, analyzed_stories, partition_fn=None):
+        """Create one chart set per partition (by default the first mentioned location), rendered in parallel"""
+        from chart_renderer import build_chart_specs, render_charts
+        if partition_fn is None:
+            partition_fn = self._primary_location
+
+        partitions = {}
+        for story in analyzed_stories:
+            partitions.setdefault(partition_fn(story), []).append(story)
+
+        chart_sets = {}
+        for partition, stories in partitions.items():
+            stats = self.generate_summary_stats(stories)
+            chart_sets[partition] = build_chart_specs(stats, stories)
+
+        return render_charts(chart_sets)
+
+    def _primary_location(self, story):
+        """First known location of an analyzed story, used as its default partition"""
+        for loc in story.get('locations', []):
+            if loc != "Unknown":
+                return loc
+        return "Unknown"
     
-    def generate_pdf_report(self, analyzed_stories, summary_stats, viz_paths):
-        """Generate a PDF report from the analysis"""
+    def generate_pdf_report(self, analyzed_stories, summary_stats, viz_paths, max_pages_per_volume=MAX_PAGES_PER_VOLUME):
+        """Generate the PDF report in volumes of at most max_pages_per_volume pages; returns every volume path"""
         today = datetime.now().strftime('%Y-%m-%d')
-        pdf = FPDF()
-        
-        # Add a Unicode-compatible font (DejaVu supports broader character sets)
-        # Note: You'll need to download DejaVuSans.ttf and place it in your project directory
-        try:
-            pdf.add_font('DejaVu', '', 'DejaVuSans.ttf', uni=True)
-            font_name = 'DejaVu'
-        except Exception as e:
-            print(f"Failed to load DejaVu font: {e}. Falling back to Arial.")
-            font_name = 'Arial'  # Fallback to Arial if font is unavailable
-        
-        # Add title page
-        pdf.add_page()
-        pdf.set_font(font_name, 'B', 24)
-        pdf.cell(0, 30, 'Story Analysis Report', 0, 1, 'C')
-        pdf.set_font(font_name, 'I', 14)
-        pdf.cell(0, 10, f'Generated on {today}', 0, 1, 'C')
-        pdf.cell(0, 10, f'Total Stories Analyzed: {summary_stats["total_stories"]}', 0, 1, 'C')
-        
-        # Add summary page
-        pdf.add_page()
-        pdf.set_font(font_name, 'B', 18)
-        pdf.cell(0, 20, 'Executive Summary', 0, 1, 'L')
-        
-        pdf.set_font(font_name, '', 12)
-        summary_text = f'This report analyzes {summary_stats["total_stories"]} stories from the WithU database, using advanced AI text analysis to assess content severity, locations, topics, and sentiment.'
-        pdf.multi_cell(0, 10, self._sanitize_text(summary_text))
-        
-        # Severity statistics
-        pdf.set_font(font_name, 'B', 14)
-        pdf.cell(0, 15, 'Severity Distribution', 0, 1, 'L')
-        pdf.set_font(font_name, '', 12)
-        for severity, count in summary_stats['severity_counts'].items():
-            percentage = (count / summary_stats["total_stories"] * 100) if summary_stats["total_stories"] > 0 else 0
-            text = f'{severity}: {count} stories ({percentage:.1f}%)'
-            pdf.cell(0, 10, self._sanitize_text(text), 0, 1)
-        
-        # Location statistics
-        if summary_stats['top_locations']:
-            pdf.set_font(font_name, 'B', 14)
-            pdf.cell(0, 15, 'Top Mentioned Locations', 0, 1, 'L')
-            pdf.set_font(font_name, '', 12)
-            for location, count in summary_stats['top_locations'].items():
-                text = f'{location}: {count} mentions'
-                pdf.cell(0, 10, self._sanitize_text(text), 0, 1)
-        
-        # Topic statistics
-        if summary_stats['top_topics']:
-            pdf.set_font(font_name, 'B', 14)
-            pdf.cell(0, 15, 'Top Story Topics', 0, 1, 'L')
-            pdf.set_font(font_name, '', 12)
-            for topic, count in summary_stats['top_topics'].items():
-                text = f'{topic}: {count} stories'
-                pdf.cell(0, 10, self._sanitize_text(text), 0, 1)
-        
-        # Entity statistics
-        if summary_stats['top_entities']:
-            pdf.set_font(font_name, 'B', 14)
-            pdf.cell(0, 15, 'Top Entities Mentioned', 0, 1, 'L')
-            pdf.set_font(font_name, '', 12)
-            for entity, count in summary_stats['top_entities'].items():
-                text = f'{entity}: {count} mentions'
-                pdf.cell(0, 10, self._sanitize_text(text), 0, 1)
-        
-        # Average statistics
-        pdf.set_font(font_name, 'B', 14)
-        pdf.cell(0, 15, 'Content Statistics', 0, 1, 'L')
-        pdf.set_font(font_name, '', 12)
-        pdf.cell(0, 10, f'Average Word Count: {summary_stats["avg_word_count"]:.1f} words', 0, 1)
-        pdf.cell(0, 10, f'Average Negative Sentiment: {summary_stats["avg_sentiment"]["negative"]:.2f}', 0, 1)
-        pdf.cell(0, 10, f'Average Positive Sentiment: {summary_stats["avg_sentiment"]["positive"]:.2f}', 0, 1)
-        pdf.cell(0, 10, f'Average Neutral Sentiment: {summary_stats["avg_sentiment"]["neutral"]:.2f}', 0, 1)
-        
-        # Add visualizations
-        for viz_path in viz_paths:
-            if os.path.exists(viz_path):
-                pdf.add_page()
-                pdf.set_font(font_name, 'B', 16)
-                title = viz_path.split('/')[-1].replace('_', ' ').replace('.png', '').title()
-                pdf.cell(0, 20, self._sanitize_text(title), 0, 1, 'C')
-                pdf.image(viz_path, x=25, w=160)
-        
-        # Add detailed story list
-        pdf.add_page()
-        pdf.set_font(font_name, 'B', 18)
-        pdf.cell(0, 20, 'Detailed Story Analysis', 0, 1, 'L')
-        
-        for i, story in enumerate(analyzed_stories):
-            if i > 0 and i % 2 == 0:
-                pdf.add_page()
-                
-            pdf.set_font(font_name, 'B', 12)
-            pdf.cell(0, 10, f"Story: {self._sanitize_text(story['title'])}", 0, 1)
-            
-            pdf.set_font(font_name, '', 10)
-            pdf.cell(0, 8, f"Author ID: {self._sanitize_text(str(story['author_id']))}", 0, 1)
-            pdf.cell(0, 8, f"Severity: {self._sanitize_text(story.get('severity_level', 'Unknown'))}", 0, 1)
-            
-            # Format the locations as a string
-            locations = ', '.join(story.get('locations', ['Unknown']))
-            pdf.cell(0, 8, f"Locations: {self._sanitize_text(locations)}", 0, 1)
-            
-            # Format the topics as a string
-            topics = ', '.join(story.get('main_topics', ['Unknown']))
-            pdf.cell(0, 8, f"Topics: {self._sanitize_text(topics)}", 0, 1)
-            
-            pdf.cell(0, 8, f"Word Count: {story.get('word_count', 0)}", 0, 1)
-            
-            # Format the created_at date
-            created_at = story['created_at']
-            if isinstance(created_at, datetime):
-                created_at_str = created_at.strftime('%Y-%m-%d')
-            else:
-                created_at_str = str(created_at)
-            pdf.cell(0, 8, f"Created: {self._sanitize_text(created_at_str)}", 0, 1)
-            
-            # Add summary if available
-            if 'summary' in story and story['summary'] != "Simple fallback analysis due to LLM error":
-                pdf.set_font(font_name, 'I', 10)
-                pdf.multi_cell(0, 8, f"Summary: {self._sanitize_text(story['summary'])}")
-            
-            # Add audience impact if available
-            if 'audience_impact' in story and story['audience_impact'] != "Analysis unavailable":
-                pdf.set_font(font_name, '', 10)
-                pdf.multi_cell(0, 8, f"Impact: {self._sanitize_text(story['audience_impact'])}")
-            
-            pdf.cell(0, 6, "", 0, 1)  # Spacing between stories
-        
-        # Save the PDF
-        filename = f'story_analysis_report_{today}.pdf'
-        pdf.output(filename)
-        print(f"Report generated: {filename}")
-        return filename
+        writer = PDFReportWriter(f'story_analysis_report_{today}', max_pages_per_volume=max_pages_per_volume)
+        writer.write_front_matter(summary_stats, viz_paths, today)
+        writer.write_stories(analyzed_stories)
+        paths = writer.close()
+
+        for path in paths:
+            print(f"Report generated: {path}")
+        return paths
+
+    def export_analyses(self, analyzed_stories, formats=('jsonl', 'csv'), output_dir='exports'):
+        """Export the analyses in machine-readable formats for the authority dashboard"""
+        os.makedirs(output_dir, exist_ok=True)
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        export_paths = []
+        for fmt in formats:
+            path = os.path.join(output_dir, f'story_analysis_{today}.{fmt}')
+            count = EXPORTERS[fmt](analyzed_stories, path)
+            print(f"Exported {count} analyses to {path}")
+            export_paths.append(path)
+        return export_paths
+
+    def geocode_locations(self, analyzed_stories, osm_path=None, output_path=INCIDENT_LAYER_PATH):
+        """Geocode story locations with the offline gazetteer and export the incident layer for safe_route"""
+        gazetteer = build_gazetteer(osm_path=osm_path)
+        points = gazetteer.geocode_stories(analyzed_stories)
+        return export_incident_layer(points, output_path)
 
     def _sanitize_text(self, text):
         """Sanitize text to remove or replace non-Latin-1 characters"""
-        if not isinstance(text, str):
-            text = str(text)
-        # Replace problematic characters with safe alternatives or remove them
-        sanitized = text.encode('latin-1', errors='replace').decode('latin-1')
-        # Alternatively, strip out anything not in Latin-1 range
-        sanitized = ''.join(c if ord(c) < 256 else '?' for c in sanitized)
-        return sanitized
+        return sanitize_text(text)
 
     def run_analysis(self):
             """Run the full analysis pipeline"""
@@ -472,17 +465,25 @@ Be objective and accurate in your assessment. For severity, "Critical" means ext
             viz_paths = self.create_visualizations(summary_stats, analyzed_stories)
             
             print("Generating PDF report...")
-            report_path = self.generate_pdf_report(analyzed_stories, summary_stats, viz_paths)
+            report_paths = self.generate_pdf_report(analyzed_stories, summary_stats, viz_paths)
+            
+            print("Exporting analyses...")
+            self.export_analyses(analyzed_stories)
+            
+            print("Geocoding story locations...")
+            self.geocode_locations(analyzed_stories)
             
             print("Analysis complete!")
-            return report_path
+            return report_paths
 
 # Main execution block
 if __name__ == "__main__":
     analyzer = StoryAnalyzer()
-    report_path = analyzer.run_analysis()
+    analyzer.enable_dedup()
+    analyzer.enable_pre_classifier()
+    report_paths = analyzer.run_analysis()
     
-    if report_path:
-        print(f"Report successfully generated at: {report_path}")
+    if report_paths:
+        print(f"Report successfully generated at: {', '.join(report_paths)}")
     else:
         print("Failed to generate report")
@@ -0,0 +1,33 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+from story_analysis import StoryAnalyzer
+from stubs import InMemoryMongoClient, StubLLM
+
+ORIGINAL = ("I was walking home from the bus stop in Adyar late at night when a man on a bike "
+            "started following me and shouting at me until I reached the main road near the temple")
+REPOST = ORIGINAL + " please be careful"
+EDITED = ("The street lights near the Egmore station have been broken for weeks and the auto "
+          "drivers refuse to stop there after dark so women have to walk alone through the lane")
+
+
+def story(story_id, text):
+    return {'_id': story_id, 'title': f'Story {story_id}', 'description': text, 'author_id': 'user1'}
+
+
+def test_edited_canonical_with_duplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    analyzer = StoryAnalyzer(client=InMemoryMongoClient(), llm=StubLLM())
+    analyzer.enable_dedup(path=str(tmp_path / 'dedup_index'))
+
+    first = analyzer.content_analysis([story('A', ORIGINAL), story('B', REPOST)])
+    assert first[1]['duplicate_of'] == 'A'
+
+    # Editing A dissolves its cluster; B, earlier in the batch, must become its own canonical
+    second = analyzer.content_analysis([story('B', REPOST), story('A', EDITED)])
+    assert [a['id'] for a in second] == ['B', 'A']
+    assert all('duplicate_of' not in a for a in second)